@@ -0,0 +1,240 @@
+"""Edge-triggered risk alerts streamed to pluggable sinks."""
+
+import errno
+import json
+import logging as log
+import os
+import queue
+import socket
+import stat
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from config_store.alerts_schema import AlertsConfig, AlertSinkConfig
+from data_collection.frames import Frame
+from data_collection.risk import Risk
+
+
+@dataclass(frozen=True)
+class AlertEvent:
+    """A joint entering or leaving a risk level."""
+
+    time: float
+    joint: str
+    level: str
+    event: str
+    angle: float
+    wall_time: float
+
+    def to_json(self) -> str:
+        """Serialize the event as a single line of JSON."""
+        return json.dumps(asdict(self))
+
+
+class EdgeDetector:
+    """
+    Turn a stream of risks into events emitted only when the risk of a joint changes.
+    """
+
+    def __init__(self, level: str) -> None:
+        """
+        :param level: name of the risk level, e.g. 'severe'.
+        :type level: str
+        """
+        self.level = level
+        self.previous: np.ndarray = None
+        self.last: Tuple[Risk, Frame] = None
+
+    def update(self, risk: Risk, frame: Frame) -> List[AlertEvent]:
+        """
+        Compare a risk with the previous one.
+        :param risk: current risk.
+        :type risk: Risk
+        :param frame: frame the risk was evaluated on, for the angles.
+        :type frame: Frame
+        :return: a 'started' event for each joint that became at risk and an 'ended' event for each joint that is
+            no longer at risk.
+        :rtype: List[AlertEvent]
+        """
+        if not len(risk.values):
+            return []
+        previous = self.previous if self.previous is not None else np.zeros_like(risk.values)
+        self.previous = risk.values
+        self.last = risk, frame
+        changed = np.flatnonzero(risk.values != previous)
+        wall_time = time.time()
+        return [
+            AlertEvent(
+                time=frame.time,
+                joint=risk.names[i],
+                level=self.level,
+                event="started" if risk.values[i] else "ended",
+                angle=float(frame.values[i]),
+                wall_time=wall_time,
+            )
+            for i in changed
+        ]
+
+    def flush(self) -> List[AlertEvent]:
+        """
+        End the stream.
+        :return: an 'ended' event, at the time of the last frame, for each joint still at risk.
+        :rtype: List[AlertEvent]
+        """
+        if self.last is None:
+            return []
+        risk, frame = self.last
+        events = self.update(Risk(time=risk.time, values=np.zeros_like(risk.values), names=risk.names), frame)
+        self.previous = None
+        self.last = None
+        return events
+
+
+class FileSink:
+    """Append events as JSON lines to a file."""
+
+    def __init__(self, path: str) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.file = open(path, "a", encoding="utf-8")
+
+    def send(self, event: AlertEvent) -> None:
+        self.file.write(event.to_json() + "\n")
+        self.file.flush()
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class SocketSink:
+    """Send each event as a JSON datagram over UDP."""
+
+    def __init__(self, host: str, port: int) -> None:
+        self.address = (host, port)
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.setblocking(False)
+
+    def send(self, event: AlertEvent) -> None:
+        try:
+            self.socket.sendto(event.to_json().encode("utf-8"), self.address)
+        except OSError:
+            # Nobody listening or buffer full: alerts are best effort and must not stall the stream.
+            pass
+
+    def close(self) -> None:
+        self.socket.close()
+
+
+class PipeSink:
+    """
+    Write events as JSON lines to a named pipe, created if needed. Events are dropped while no reader is connected.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        if not os.path.exists(path):
+            os.mkfifo(path)
+        elif not stat.S_ISFIFO(os.stat(path).st_mode):
+            raise ValueError(f"{path} exists and is not a named pipe.")
+        self.fd = None
+
+    def send(self, event: AlertEvent) -> None:
+        try:
+            if self.fd is None:
+                self.fd = os.open(self.path, os.O_WRONLY | os.O_NONBLOCK)
+            os.write(self.fd, (event.to_json() + "\n").encode("utf-8"))
+        except OSError as error:
+            if error.errno == errno.EPIPE and self.fd is not None:
+                # The reader went away, reopen on the next event.
+                os.close(self.fd)
+                self.fd = None
+            elif error.errno not in (errno.ENXIO, errno.EAGAIN):
+                raise
+
+    def close(self) -> None:
+        if self.fd is not None:
+            os.close(self.fd)
+
+
+SINKS = {
+    "file": lambda c: FileSink(c.path),
+    "socket": lambda c: SocketSink(c.host, c.port),
+    "pipe": lambda c: PipeSink(c.path),
+}
+
+
+def create_sink(config: AlertSinkConfig):
+    """
+    Create a sink from its configuration.
+    :param config: sink configuration.
+    :type config: AlertSinkConfig
+    :return: the sink.
+    """
+    if config.type not in SINKS:
+        raise ValueError(f"Unknown alert sink type: {config.type}. Available types: {', '.join(SINKS)}")
+    return SINKS[config.type](config)
+
+
+class AlertDispatcher:
+    """
+    Detect risk changes and deliver the events to the sinks from a background thread, so that publishing never
+    blocks the caller. Events are dropped if the sinks fall behind by more than queue_size events.
+    """
+
+    def __init__(self, config: AlertsConfig, levels: Sequence[str] = ("severe", "moderate")) -> None:
+        """
+        :param config: alerts configuration.
+        :type config: AlertsConfig
+        :param levels: names of the risk levels to track.
+        :type levels: Sequence[str]
+        """
+        self.logger = log.getLogger("ALERTS")
+        self.detectors: Dict[str, EdgeDetector] = {level: EdgeDetector(level) for level in levels}
+        self.sinks = [create_sink(sink) for sink in config.sinks]
+        self.queue = queue.Queue(maxsize=config.queue_size)
+        self.dropped = 0
+        self.thread = threading.Thread(target=self._deliver, name="alerts", daemon=True)
+        self.thread.start()
+
+    def publish(self, level: str, risk: Risk, frame: Frame) -> None:
+        """
+        Queue the events of a risk level for delivery.
+        :param level: name of the risk level.
+        :type level: str
+        :param risk: current risk of that level.
+        :type risk: Risk
+        :param frame: frame the risk was evaluated on.
+        :type frame: Frame
+        """
+        for event in self.detectors[level].update(risk, frame):
+            try:
+                self.queue.put_nowait(event)
+            except queue.Full:
+                self.dropped += 1
+
+    def close(self) -> None:
+        """End the episodes still open, deliver the queued events and close the sinks."""
+        for detector in self.detectors.values():
+            for event in detector.flush():
+                self.queue.put(event)
+        self.queue.put(None)
+        self.thread.join()
+        for sink in self.sinks:
+            sink.close()
+        if self.dropped:
+            self.logger.warning("%d alerts were dropped because the sinks were too slow.", self.dropped)
+
+    def _deliver(self) -> None:
+        while True:
+            event = self.queue.get()
+            if event is None:
+                return
+            for sink in self.sinks:
+                try:
+                    sink.send(event)
+                except Exception as error:
+                    self.logger.error("Could not send alert to %s: %s", type(sink).__name__, error)
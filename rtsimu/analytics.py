@@ -0,0 +1,211 @@
+"""Risk exposure analytics over the recorded frames and risks."""
+
+import argparse
+import logging as log
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+RISK_LEVELS = ("severe", "moderate")
+
+
+def sample_period(time: np.ndarray, default: float = 0.0) -> float:
+    """
+    Estimate the sample period of a session from its timestamps.
+    :param time: timestamps in seconds.
+    :type time: np.ndarray
+    :param default: period returned when there are too few timestamps to estimate it.
+    :type default: float
+    :return: the sample period in seconds.
+    :rtype: float
+    """
+    return float(np.median(np.diff(time))) if len(time) > 1 else default
+
+
+def split_sessions(time: np.ndarray) -> List[slice]:
+    """
+    Split rows appended by consecutive runs into sessions, which start wherever the time goes back.
+    :param time: timestamps in seconds.
+    :type time: np.ndarray
+    :return: the rows of each session.
+    :rtype: List[slice]
+    """
+    bounds = np.concatenate(([0], np.flatnonzero(np.diff(time) <= 0) + 1, [len(time)]))
+    return [slice(start, end) for start, end in zip(bounds[:-1], bounds[1:])]
+
+
+def run_lengths(mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Run-length encode the True runs of each column of a boolean matrix.
+    :param mask: boolean matrix with one row per frame and one column per joint.
+    :type mask: np.ndarray
+    :return: the column, first row and row after the last of each run, sorted by column and then by row.
+    :rtype: Tuple[np.ndarray, np.ndarray, np.ndarray]
+    """
+    padded = np.zeros((mask.shape[1], mask.shape[0] + 2), dtype=np.int8)
+    padded[:, 1:-1] = mask.T
+    change = np.diff(padded, axis=1)
+    columns, starts = np.nonzero(change == 1)
+    _, ends = np.nonzero(change == -1)
+    return columns, starts, ends
+
+
+def extract_episodes(
+        time: np.ndarray, risk: np.ndarray, angles: np.ndarray, names: List[str], period: float = None
+) -> pd.DataFrame:
+    """
+    Extract the risk episodes of each joint.
+    :param time: timestamps in seconds.
+    :type time: np.ndarray
+    :param risk: boolean matrix with one row per frame and one column per joint.
+    :type risk: np.ndarray
+    :param angles: angles in degrees, same shape as risk.
+    :type angles: np.ndarray
+    :param names: name of each joint.
+    :type names: List[str]
+    :param period: sample period in seconds. If None, it is estimated from the timestamps.
+    :type period: float
+    :return: one row per episode with the joint, start, end, duration and peak angle (largest in absolute value).
+    :rtype: pd.DataFrame
+    """
+    columns, starts, ends = run_lengths(risk)
+    period = sample_period(time) if period is None else period
+
+    # Peak of each episode with a single reduceat over the joints laid end to end.
+    num_frames = len(time)
+    flat = np.append(angles.T.ravel(), 0.0)
+    bounds = np.empty(2 * len(starts), dtype=np.intp)
+    bounds[0::2] = columns * num_frames + starts
+    bounds[1::2] = columns * num_frames + ends
+    if len(bounds):
+        highest = np.maximum.reduceat(flat, bounds)[0::2]
+        lowest = np.minimum.reduceat(flat, bounds)[0::2]
+        peak = np.where(np.abs(highest) >= np.abs(lowest), highest, lowest)
+    else:
+        peak = np.empty(0)
+
+    start_time = time[starts]
+    end_time = time[ends - 1] + period
+    return pd.DataFrame({
+        "joint": pd.Categorical.from_codes(columns, names),
+        "start": start_time,
+        "end": end_time,
+        "duration": end_time - start_time,
+        "peak_angle": peak,
+    })
+
+
+def exposure(
+        time: np.ndarray, risk: np.ndarray, bucket: float, period: float = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Time spent at risk by each joint in consecutive buckets of fixed length (e.g. an hour or a shift).
+    :param time: timestamps in seconds.
+    :type time: np.ndarray
+    :param risk: boolean matrix with one row per frame and one column per joint.
+    :type risk: np.ndarray
+    :param bucket: length of each bucket in seconds.
+    :type bucket: float
+    :param period: sample period in seconds. If None, it is estimated from the timestamps.
+    :type period: float
+    :return: the start of each bucket and the exposure in seconds, one row per bucket and one column per joint.
+    :rtype: Tuple[np.ndarray, np.ndarray]
+    """
+    num_buckets = int((time[-1] - time[0]) // bucket) + 1
+    edges = time[0] + bucket * np.arange(num_buckets + 1)
+    rows = np.searchsorted(time, edges)
+    cumulative = np.zeros((len(time) + 1, risk.shape[1]))
+    np.cumsum(risk, axis=0, out=cumulative[1:])
+    period = sample_period(time) if period is None else period
+    return edges[:-1], np.diff(cumulative[rows], axis=0) * period
+
+
+def summarize(episodes: pd.DataFrame, risk: np.ndarray, names: List[str], period: float) -> pd.DataFrame:
+    """
+    Summarize the exposure of each joint over a session.
+    :param episodes: episodes returned by extract_episodes.
+    :type episodes: pd.DataFrame
+    :param risk: boolean matrix with one row per frame and one column per joint.
+    :type risk: np.ndarray
+    :param names: name of each joint.
+    :type names: List[str]
+    :param period: sample period in seconds.
+    :type period: float
+    :return: one row per joint with the number of episodes, exposure, fraction of time at risk, longest episode and
+        peak angle.
+    :rtype: pd.DataFrame
+    """
+    grouped = episodes.groupby("joint", sort=False, observed=True)
+    summary = pd.DataFrame({
+        "episodes": grouped.size(),
+        "longest_episode": grouped["duration"].max(),
+        "peak_angle": grouped["peak_angle"].agg(lambda p: p.iloc[np.argmax(np.abs(p.to_numpy()))]),
+    }).reindex(names)
+    summary["episodes"] = summary["episodes"].fillna(0).astype(int)
+    summary["exposure"] = risk.sum(axis=0) * period
+    summary["exposure_fraction"] = risk.mean(axis=0) if len(risk) else 0.0
+    summary.index.name = "joint"
+    return summary.reset_index()
+
+
+def analyze(data_path: Path, shift: float = 8 * 3600, frame_period: float = None) -> Dict[str, pd.DataFrame]:
+    """
+    Analyze the frames and risks saved in a results directory, session by session.
+    :param data_path: directory with frames.csv, severe_risk.csv and moderate_risk.csv.
+    :type data_path: Path
+    :param shift: length of a shift in seconds.
+    :type shift: float
+    :param frame_period: period of the frames in seconds, for the sessions too short to estimate it. If None, the
+        median period of the other sessions is used, and sessions with a single frame are skipped if there is none.
+    :type frame_period: float
+    :return: the episodes, the hourly and per shift exposure, and the summary of each session and risk level.
+    :rtype: Dict[str, pd.DataFrame]
+    """
+    frames = pd.read_csv(data_path / "frames.csv")
+    names = list(frames.columns[1:])
+    time = frames["time"].to_numpy()
+    angles = frames[names].to_numpy()
+    tables = {"episodes": [], "hourly_exposure": [], "shift_exposure": [], "summary": []}
+    sessions = split_sessions(time)
+    if frame_period is None:
+        steps = np.concatenate([np.diff(time[rows]) for rows in sessions])
+        frame_period = float(np.median(steps)) if len(steps) else 0.0
+    periods = [sample_period(time[rows], default=frame_period) for rows in sessions]
+    for session, period in enumerate(periods):
+        if period <= 0:
+            log.getLogger("ANALYTICS").warning(
+                "Skipping session %d of %s: a single frame and no frame period to use.", session, data_path
+            )
+
+    for level in RISK_LEVELS:
+        risk = pd.read_csv(data_path / f"{level}_risk.csv")[names].to_numpy() > 0
+        for session, (rows, period) in enumerate(zip(sessions, periods)):
+            if period <= 0:
+                continue
+            keys = {"session": session, "level": level}
+            episodes = extract_episodes(time[rows], risk[rows], angles[rows], names, period)
+            tables["episodes"].append(episodes.assign(**keys))
+            tables["summary"].append(summarize(episodes, risk[rows], names, period).assign(**keys))
+            for table, bucket in (("hourly_exposure", 3600), ("shift_exposure", shift)):
+                starts, seconds = exposure(time[rows], risk[rows], bucket, period)
+                tables[table].append(pd.DataFrame(seconds, columns=names).assign(start=starts, **keys))
+
+    return {name: pd.concat(dfs, ignore_index=True) if dfs else pd.DataFrame() for name, dfs in tables.items()}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extract risk episodes and exposure from results directories.")
+    parser.add_argument("data_paths", type=Path, nargs="+", help="results directories to analyze.")
+    parser.add_argument("--shift-hours", type=float, default=8, help="length of a shift in hours (default: 8).")
+    parser.add_argument(
+        "--frame-period", type=float, default=None,
+        help="period of the frames in seconds, for sessions with a single frame (default: estimated from the others)."
+    )
+    args = parser.parse_args()
+
+    for path in args.data_paths:
+        for name, table in analyze(path, args.shift_hours * 3600, args.frame_period).items():
+            table.to_csv(path / f"risk_{name}.csv", index=False)
+        print(f"Risk analytics written to {path}")
@@ -0,0 +1,175 @@
+"""Batch processing of many recordings across a process pool."""
+
+import glob
+import logging as log
+import multiprocessing as mp
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import hydra
+import pandas as pd
+
+from config_store import BaseConfig, BatchBaseConfig, register_configs
+from offline import RecordingProcessor
+
+# Register hydra config classes
+register_configs()
+
+# Processor of each worker process, with the model loaded once by init_worker.
+_processor: RecordingProcessor = None
+
+
+def expand_recordings(patterns: List[str]) -> Tuple[List[Path], List[str]]:
+    """
+    Expand glob patterns into recording directories.
+    :param patterns: recording directories or glob patterns matching them.
+    :type patterns: List[str]
+    :return: the recording directories, without duplicates, in order, and the patterns matching nothing and the
+        matches that are not directories.
+    :rtype: Tuple[List[Path], List[str]]
+    """
+    recordings, missing = [], []
+    for pattern in patterns:
+        for match in sorted(glob.glob(pattern)) or [pattern]:
+            path = Path(match)
+            if not path.is_dir():
+                missing.append(match)
+            elif path not in recordings:
+                recordings.append(path)
+    return recordings, missing
+
+
+def output_dirs(recordings: List[Path], output_path: Path) -> Dict[Path, Path]:
+    """
+    Give each recording its own output directory, named after the recording.
+    :param recordings: recording directories.
+    :type recordings: List[Path]
+    :param output_path: directory holding the output directories.
+    :type output_path: Path
+    :return: the output directory of each recording.
+    :rtype: Dict[Path, Path]
+    """
+    outputs = {}
+    used = set()
+    for recording in recordings:
+        name = recording.resolve().name
+        unique, n = name, 1
+        while unique in used:
+            unique, n = f"{name}_{n}", n + 1
+        used.add(unique)
+        outputs[recording] = output_path / unique
+    return outputs
+
+
+def init_worker(config: BaseConfig) -> None:
+    """
+    Load the model once per worker process.
+    :param config: configuration of the pipeline.
+    :type config: BaseConfig
+    """
+    global _processor
+    _processor = RecordingProcessor(config)
+
+
+def run_job(recording: Path, output: Path) -> Dict[str, Any]:
+    """
+    Process a recording and write its outputs.
+    :param recording: recording directory.
+    :type recording: Path
+    :param output: output directory.
+    :type output: Path
+    :return: the number of frames and the duration of the job, in seconds.
+    :rtype: Dict[str, Any]
+    """
+    start = time.perf_counter()
+    result = _processor.process(recording)
+    _processor.write(result, output)
+    return {"frames": len(result.time), "seconds": time.perf_counter() - start, "pid": os.getpid()}
+
+
+@hydra.main(config_path=Path("rtsimu/config").absolute().as_posix(), config_name="batch", version_base=None)
+def main(config: BatchBaseConfig):
+    """Batch function."""
+    logger = log.getLogger("MAIN")
+
+    recordings, missing = expand_recordings(list(config.batch.recordings))
+    for match in missing:
+        logger.warning("%s is not a recording directory, skipped.", match)
+    output_path = Path(config.batch.output_path)
+    outputs = output_dirs(recordings, output_path)
+    workers = min(config.batch.workers or os.cpu_count(), max(len(recordings), 1))
+    logger.info("Processing %d recordings on %d workers.", len(recordings), workers)
+
+    report = [{"recording": match, "status": "not found"} for match in missing]
+    # Attempt number of the recordings to run in the next pool, and recordings whose worker died while they ran.
+    todo: Dict[Path, int] = {recording: 1 for recording in recordings}
+    suspects: List[Tuple[Path, int]] = []
+    start = time.perf_counter()
+    try:
+        while todo or suspects:
+            # A dead worker breaks the whole pool and every job running on it, so the culprit is unknown: the jobs of
+            # a broken pool are run again one at a time, where a crash only charges an attempt to the job causing it.
+            isolated = not todo
+            jobs = dict([suspects.pop(0)]) if isolated else todo
+            todo = {}
+            with ProcessPoolExecutor(
+                    max_workers=1 if isolated else workers, mp_context=mp.get_context("spawn"),
+                    initializer=init_worker, initargs=(config,)
+            ) as executor:
+                pending = {executor.submit(run_job, r, outputs[r]): (r, attempt) for r, attempt in jobs.items()}
+                broken = False
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        recording, attempt = pending.pop(future)
+                        try:
+                            job = future.result()
+                        except BrokenProcessPool as error:
+                            broken = True
+                            if not isolated:
+                                suspects.append((recording, attempt))
+                                continue
+                            job, failure = None, error
+                        except Exception as error:
+                            job, failure = None, error
+                        if job is not None:
+                            logger.info("%s: %d frames in %.2f s.", recording, job["frames"], job["seconds"])
+                            report.append({"recording": str(recording), "status": "done", "attempts": attempt,
+                                           "output": str(outputs[recording]), **job})
+                        elif attempt <= config.batch.retries:
+                            logger.warning("%s failed (attempt %d), retrying: %s", recording, attempt, failure)
+                            if broken:
+                                todo[recording] = attempt + 1
+                            else:
+                                pending[executor.submit(run_job, recording, outputs[recording])] = \
+                                    (recording, attempt + 1)
+                        else:
+                            logger.error("%s failed after %d attempts: %s", recording, attempt, failure)
+                            report.append({"recording": str(recording), "status": "failed", "attempts": attempt,
+                                           "error": repr(failure)})
+                if broken:
+                    logger.warning("A worker died, %d recordings will be run again.", len(suspects))
+    finally:
+        # Recordings never finished, e.g. after an interruption.
+        reported = {r["recording"] for r in report}
+        for recording in recordings:
+            if str(recording) not in reported:
+                report.append({"recording": str(recording), "status": "not run"})
+        output_path.mkdir(parents=True, exist_ok=True)
+        pd.DataFrame(report).to_csv(output_path / "batch_report.csv", index=False)
+
+    elapsed = time.perf_counter() - start
+    failed = sum(r["status"] != "done" for r in report)
+    busy = sum(r.get("seconds", 0.0) for r in report)
+    logger.info(
+        "%d recordings done, %d failed or not found, in %.2f s (%.2f s of processing, %.1fx speedup).",
+        len(report) - failed, failed, elapsed, busy, busy / elapsed if elapsed else 0.0
+    )
+
+
+if __name__ == "__main__":
+    main()
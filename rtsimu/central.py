@@ -0,0 +1,275 @@
+"""Central node: run the inverse kinematics and the risks of the wearers streamed by the edge nodes."""
+
+import logging as log
+import multiprocessing as mp
+import re
+import socket
+import socketserver
+import struct
+import threading
+from pathlib import Path
+from typing import Dict, Tuple
+
+import hydra
+
+from config_store import BaseConfig, CentralBaseConfig, register_configs
+from data_collection.frames import Frame, FrameCollection
+from data_collection.imu import IMUCollection, QuaternionData
+from data_collection.risk import RiskCollection
+from data_collection.storage import write_data
+from transport import BATCH, END, HELLO, decode_batch, decode_hello, read_message
+from utils import HOT_PATH, create_colorlog_logger, create_queue_logger, start_log_listener, stop_log_listener
+
+# Register hydra config classes
+register_configs()
+
+# Names of wearers and sensors, used as directory names: a single path component.
+SAFE_NAME = re.compile(r"[A-Za-z0-9_.-]+")
+
+
+def is_safe_name(name: str) -> bool:
+    """
+    Check that a name received from an edge node can be used as a directory, logger and process name.
+    :param name: name of a wearer or a sensor.
+    :type name: str
+    :return: whether the name is a single path component other than . and ..
+    :rtype: bool
+    """
+    return isinstance(name, str) and SAFE_NAME.fullmatch(name) is not None and name not in (".", "..")
+
+
+def wearer_process(
+        config: BaseConfig, wearer: str, sensors: Dict[str, str], queue: mp.Queue, log_queue: mp.Queue = None
+) -> None:
+    """
+    Solve and evaluate the frames of a wearer until the end of the stream, then write the outputs to
+    <data_path>/<wearer>/ in the same layout as main.py.
+    :param config: configuration of the pipeline.
+    :type config: BaseConfig
+    :param wearer: name of the wearer.
+    :type wearer: str
+    :param sensors: model frame of each sensor, in the order of the quaternions of the batches.
+    :type sensors: Dict[str, str]
+    :param queue: batches of the wearer, as (time, quaternions) pairs, and None at the end of the stream.
+    :type queue: multiprocessing.Queue
+    :param log_queue: queue of the main process log listener. If None, the process logs to the terminal directly.
+    :type log_queue: multiprocessing.Queue
+    """
+    # Imported here so that only the wearer processes load OpenSim.
+    from evaluator import Evaluator
+    from kinematics import InverseKinematics
+
+    if log_queue is not None:
+        logger = create_queue_logger(log_queue, name=wearer, sample_interval=config.log.sample_interval)
+    else:
+        logger = create_colorlog_logger(name=wearer, sample_interval=config.log.sample_interval)
+
+    ik = InverseKinematics(config.opensim)
+    risk_evaluator = Evaluator(config.opensim.risk.severe.rules, config.opensim.risk.moderate.rules, ik.names)
+    quaternion_collection = {name: IMUCollection() for name in sensors}
+    frame_collection = FrameCollection()
+    severe_risk_collection = RiskCollection()
+    moderate_risk_collection = RiskCollection()
+    logger.info("Process started.")
+
+    while True:
+        batch = queue.get()
+        if batch is None:
+            break
+        for t, quaternions in zip(*batch):
+            t = float(t)
+            quaternions = quaternions.round(5)
+            for name, (w, x, y, z) in zip(sensors, quaternions):
+                quaternion_collection[name].append(QuaternionData(t, float(w), float(x), float(y), float(z)))
+            frame = Frame(time=t, values=ik.solve(t, dict(zip(sensors.values(), quaternions))), names=ik.names)
+            frame_collection.append(frame)
+            severe_risk_collection.append(risk_evaluator.eval_sev_risk(frame))
+            moderate_risk_collection.append(risk_evaluator.eval_mod_risk(frame))
+        logger.info("Frames collected: %s", len(frame_collection), extra=HOT_PATH)
+
+    path = Path(config.data_path) / wearer
+    for name, collection in quaternion_collection.items():
+        write_data(path / name / "quaternions.csv", collection)
+    write_data(path / "frames.csv", frame_collection)
+    write_data(path / "severe_risk.csv", severe_risk_collection)
+    write_data(path / "moderate_risk.csv", moderate_risk_collection)
+    logger.info("%d frames written to %s.", len(frame_collection), path)
+
+
+class CentralNode:
+    """
+    Receive the streams of the edge nodes, one connection per wearer, and hand the batches over to a process per
+    wearer. Batches received twice after a reconnection are dropped, and missing batches are reported.
+    """
+
+    def __init__(self, config: CentralBaseConfig, log_queue: mp.Queue = None) -> None:
+        """
+        :param config: configuration of the central node.
+        :type config: CentralBaseConfig
+        :param log_queue: queue of the log listener, for the wearer processes.
+        :type log_queue: multiprocessing.Queue
+        """
+        self.logger = log.getLogger("CENTRAL")
+        self.config = config
+        self.log_queue = log_queue
+        self.workers: Dict[str, Tuple[mp.Process, mp.Queue]] = {}
+        self.sessions: Dict[str, float] = {}
+        self.sequences: Dict[str, int] = {}
+        self.finished = 0
+        self.done = threading.Event()
+        self.lock = threading.Lock()
+        # Serialize the session changes of each wearer without holding the lock needed by the other wearers.
+        self.start_locks: Dict[str, threading.Lock] = {}
+
+    def serve(self, connection: socket.socket) -> None:
+        """
+        Handle the connection of an edge node until the end of its stream or a disconnection.
+        :param connection: connected socket.
+        :type connection: socket.socket
+        """
+        try:
+            host, port = connection.getpeername()[:2]
+            peer = f"{host}:{port}"
+        except OSError:
+            peer = "unknown peer"
+        try:
+            kind, payload = read_message(connection)
+            if kind != HELLO:
+                self.logger.error("%s: expected a hello message, got type %d.", peer, kind)
+                return
+            try:
+                wearer, session, sensors = decode_hello(payload)
+                session = float(session)
+            except (ValueError, KeyError, TypeError) as error:
+                # Not JSON, not UTF-8 or missing fields.
+                self.logger.error("%s: malformed hello, connection closed: %r", peer, error)
+                return
+            names_ok = is_safe_name(wearer) and sensors and all(map(is_safe_name, sensors))
+            if not names_ok or not all(isinstance(frame, str) for frame in sensors.values()):
+                self.logger.error("%s: invalid wearer or sensor names, connection refused: %r", peer, payload[:200])
+                return
+            queue = self._start(wearer, session, sensors)
+            self.logger.info("Wearer %s connected with %d sensors.", wearer, len(sensors))
+
+            while True:
+                kind, payload = read_message(connection)
+                if kind == BATCH:
+                    try:
+                        sequence, times, quaternions = decode_batch(payload, len(sensors))
+                    except (ValueError, struct.error) as error:
+                        # Shorter than the rows it announces.
+                        self.logger.error("Wearer %s: malformed batch, connection closed: %r", wearer, error)
+                        return
+                    with self.lock:
+                        last = self.sequences[wearer]
+                        if sequence <= last:
+                            continue
+                        self.sequences[wearer] = sequence
+                    if sequence > last + 1:
+                        self.logger.warning("Wearer %s: %d batches lost.", wearer, sequence - last - 1)
+                    # Blocks while the wearer process is behind, which slows down the edge node through TCP.
+                    queue.put((times, quaternions))
+                elif kind == END:
+                    self._finish(wearer)
+                    return
+                else:
+                    self.logger.warning("Wearer %s: unknown message type %d.", wearer, kind)
+        except ConnectionError as error:
+            self.logger.warning("Connection lost: %s", error)
+        finally:
+            connection.close()
+
+    def close(self) -> None:
+        """End the streams still open and wait for every wearer process to write its outputs."""
+        with self.lock:
+            workers = list(self.workers.values())
+        for process, queue in workers:
+            if process.is_alive():
+                queue.put(None)
+        for process, _ in workers:
+            process.join()
+
+    def _start(self, wearer: str, session: float, sensors: Dict[str, str]) -> mp.Queue:
+        """Return the queue of a wearer, starting its process on a new session."""
+        with self.lock:
+            start_lock = self.start_locks.setdefault(wearer, threading.Lock())
+        with start_lock:
+            with self.lock:
+                if self.sessions.get(wearer) == session:
+                    return self.workers[wearer][1]
+                previous = self.workers.get(wearer)
+            if previous is not None:
+                # A new session of the same wearer: finish the previous one first. Outside the lock, as the process may
+                # still have a full queue of batches to solve and the other wearers need the lock for each batch.
+                process, queue = previous
+                queue.put(None)
+                process.join()
+            queue = mp.Queue(maxsize=self.config.central.queue_size)
+            process = mp.Process(
+                target=wearer_process, args=(self.config, wearer, sensors, queue, self.log_queue), name=wearer
+            )
+            process.start()
+            with self.lock:
+                self.workers[wearer] = process, queue
+                self.sessions[wearer] = session
+                self.sequences[wearer] = -1
+            return queue
+
+    def _finish(self, wearer: str) -> None:
+        with self.lock:
+            queue = self.workers[wearer][1]
+        # Blocks while the queue is full, so outside the lock.
+        queue.put(None)
+        with self.lock:
+            self.finished += 1
+            self.logger.info("Wearer %s finished its stream.", wearer)
+            if 0 < self.config.central.expected_wearers <= self.finished:
+                self.done.set()
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, node: CentralNode) -> None:
+        self.node = node
+        super().__init__((node.config.central.host, node.config.central.port), _Handler)
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self) -> None:
+        self.server.node.serve(self.request)
+
+
+@hydra.main(config_path=Path("rtsimu/config").absolute().as_posix(), config_name="central", version_base=None)
+def main(config: CentralBaseConfig):
+    """Central function."""
+    log_queue = mp.Queue() if config.log.mode == "queue" else None
+    log_listener = start_log_listener(log_queue) if log_queue is not None else None
+    try:
+        logger = log.getLogger("MAIN")
+
+        node = CentralNode(config, log_queue)
+        server = _Server(node)
+        thread = threading.Thread(target=server.serve_forever, name="server", daemon=True)
+        thread.start()
+        logger.info("Listening on %s:%d.", config.central.host, config.central.port)
+
+        try:
+            node.done.wait()
+        except KeyboardInterrupt:
+            logger.info("Interrupted.")
+        finally:
+            server.shutdown()
+            server.server_close()
+            node.close()
+
+        logger.info("Terminating process.")
+    finally:
+        if log_listener is not None:
+            stop_log_listener(log_listener)
+
+
+if __name__ == "__main__":
+    mp.set_start_method("spawn")
+    main()
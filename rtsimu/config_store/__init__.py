@@ -2,6 +2,15 @@ from dataclasses import MISSING, dataclass, field
 from hydra.core.config_store import ConfigStore
 from .sensor_schema import SensorConfig
 from .opensim_schema import OpensimConfig
+from .alerts_schema import AlertsConfig
+from .archive_schema import ArchiveConfig
+from .batch_schema import BatchConfig
+from .logging_schema import LoggingConfig
+from .network_schema import CentralConfig, EdgeConfig
+from .pipeline_schema import PipelineConfig
+from .scheduling_schema import SchedulingConfig
+from .sweep_schema import SweepConfig
+from .validate_schema import ValidateConfig
 
 
 @dataclass
@@ -13,6 +22,51 @@ class BaseConfig:
     opensim_process_data: bool = True
     sensor: SensorConfig = field(default_factory=SensorConfig)
     opensim: OpensimConfig = field(default_factory=OpensimConfig)
+    log: LoggingConfig = field(default_factory=LoggingConfig)
+    pipeline: PipelineConfig = field(default_factory=PipelineConfig)
+    scheduling: SchedulingConfig = field(default_factory=SchedulingConfig)
+    alerts: AlertsConfig = field(default_factory=AlertsConfig)
+    archive: ArchiveConfig = field(default_factory=ArchiveConfig)
+
+
+@dataclass
+class SweepBaseConfig(BaseConfig):
+    """
+    Config for the AHRS parameter sweep.
+    """
+    sweep: SweepConfig = field(default_factory=SweepConfig)
+
+
+@dataclass
+class BatchBaseConfig(BaseConfig):
+    """
+    Config for the batch processing of recordings.
+    """
+    batch: BatchConfig = field(default_factory=BatchConfig)
+
+
+@dataclass
+class ValidateBaseConfig(BaseConfig):
+    """
+    Config for the validation of a candidate configuration.
+    """
+    validate: ValidateConfig = field(default_factory=ValidateConfig)
+
+
+@dataclass
+class EdgeBaseConfig(BaseConfig):
+    """
+    Config for an edge node, streaming the orientations of a wearer to the central node.
+    """
+    edge: EdgeConfig = field(default_factory=EdgeConfig)
+
+
+@dataclass
+class CentralBaseConfig(BaseConfig):
+    """
+    Config for the central node, running the inverse kinematics and the risks of the wearers.
+    """
+    central: CentralConfig = field(default_factory=CentralConfig)
 
 
 def register_configs():
@@ -21,5 +75,10 @@ def register_configs():
     """
     cs = ConfigStore.instance()
     cs.store(name="base_config", node=BaseConfig)
+    cs.store(name="base_sweep_config", node=SweepBaseConfig)
+    cs.store(name="base_batch_config", node=BatchBaseConfig)
+    cs.store(name="base_validate_config", node=ValidateBaseConfig)
+    cs.store(name="base_edge_config", node=EdgeBaseConfig)
+    cs.store(name="base_central_config", node=CentralBaseConfig)
     cs.store(group="sensor", name="base_sensor_config", node=SensorConfig)
     cs.store(group="opensim", name="base_opensim_config", node=OpensimConfig)
@@ -0,0 +1,23 @@
+from dataclasses import dataclass, field
+from typing import List
+
+
+@dataclass
+class AlertSinkConfig:
+    """
+    Destination of the alerts.
+    """
+    type: str = "file"
+    path: str = ""
+    host: str = "127.0.0.1"
+    port: int = 0
+
+
+@dataclass
+class AlertsConfig:
+    """
+    Risk alerts configuration.
+    """
+    enabled: bool = False
+    queue_size: int = 1024
+    sinks: List[AlertSinkConfig] = field(default_factory=list)
@@ -0,0 +1,12 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class ArchiveConfig:
+    """
+    Session archive configuration.
+    """
+    enabled: bool = False
+    path: str = "results/archive"
+    chunk_size: int = 4096
+    worker: str = ""
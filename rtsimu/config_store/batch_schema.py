@@ -0,0 +1,13 @@
+from dataclasses import dataclass, field
+from typing import List
+
+
+@dataclass
+class BatchConfig:
+    """
+    Batch processing configuration.
+    """
+    recordings: List[str] = field(default_factory=list)
+    output_path: str = "results/batch"
+    workers: int = 0
+    retries: int = 1
@@ -0,0 +1,10 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class LoggingConfig:
+    """
+    Logging configuration.
+    """
+    mode: str = "queue"
+    sample_interval: float = 1.0
@@ -0,0 +1,26 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class EdgeConfig:
+    """
+    Edge node configuration.
+    """
+    wearer: str = "wearer"
+    host: str = "127.0.0.1"
+    port: int = 5555
+    batch_size: int = 10
+    max_delay: float = 0.1
+    backlog: int = 100
+    reconnect_interval: float = 1.0
+
+
+@dataclass
+class CentralConfig:
+    """
+    Central node configuration.
+    """
+    host: str = "127.0.0.1"
+    port: int = 5555
+    expected_wearers: int = 0
+    queue_size: int = 1000
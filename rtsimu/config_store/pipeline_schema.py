@@ -0,0 +1,10 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class PipelineConfig:
+    """
+    Main loop pipeline configuration.
+    """
+    enabled: bool = True
+    queue_size: int = 4
@@ -0,0 +1,13 @@
+from dataclasses import dataclass, field
+from typing import List
+
+
+@dataclass
+class SchedulingConfig:
+    """
+    CPU scheduling configuration.
+    """
+    ik_cores: List[int] = field(default_factory=list)
+    ik_priority: int = 0
+    worker_cores: List[int] = field(default_factory=list)
+    worker_priority: int = 0
@@ -0,0 +1,28 @@
+from dataclasses import dataclass, field
+from typing import List
+
+
+@dataclass
+class AHRSGrid:
+    """
+    Values of each AHRS setting to sweep. For a random search, values are drawn between the minimum and the maximum.
+    """
+    gain: List[float] = field(default_factory=lambda: [0.5])
+    acceleration_rejection: List[float] = field(default_factory=lambda: [10])
+    magnetic_rejection: List[float] = field(default_factory=lambda: [20])
+    rejection_timeout: List[int] = field(default_factory=lambda: [500])
+
+
+@dataclass
+class SweepConfig:
+    """
+    AHRS parameter sweep configuration.
+    """
+    strategy: str = "grid"
+    num_samples: int = 20
+    seed: int = 0
+    workers: int = 0
+    compute_angles: bool = False
+    drift_weight: float = 1.0
+    stability_weight: float = 1.0
+    grid: AHRSGrid = field(default_factory=AHRSGrid)
@@ -0,0 +1,15 @@
+from dataclasses import dataclass, field
+from typing import List
+
+
+@dataclass
+class ValidateConfig:
+    """
+    Validation of a candidate configuration against the reference configuration.
+    """
+    recordings: List[str] = field(default_factory=list)
+    candidate: List[str] = field(default_factory=list)
+    output_path: str = "results/validation"
+    max_angle_rms: float = 2.0
+    min_agreement: float = 0.98
+    max_episode_shift: float = 0.5
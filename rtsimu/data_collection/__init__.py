@@ -1 +1 @@
-from . import frames, imu, risk
\ No newline at end of file
+from . import archive, frames, imu, risk, storage
\ No newline at end of file
@@ -0,0 +1,180 @@
+"""Archive namespace for data management."""
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+INDEX_FILE = "index.json"
+
+
+class SessionWriter:
+    """
+    Write the streams of a session (raw IMU, quaternions, frames, risks...) in compressed chunks of rows, along with
+    an index of the time range covered by each chunk.
+    Every stream is a 2D array whose first column is the time, in seconds since the start of the session.
+    """
+
+    def __init__(self, root: Path, session: str, chunk_size: int = 4096, metadata: Dict[str, Any] = None) -> None:
+        """
+        :param root: directory of the archive.
+        :type root: Path
+        :param session: name of the session.
+        :type session: str
+        :param chunk_size: number of rows per chunk.
+        :type chunk_size: int
+        :param metadata: information about the session saved in the index, e.g. the worker and the start time.
+        :type metadata: Dict[str, Any]
+        :raises FileExistsError: if the session already exists, rather than overwriting its chunks.
+        """
+        self.path = Path(root) / session
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.mkdir()
+        self.chunk_size = chunk_size
+        self.index: Dict[str, Any] = {"session": session, "metadata": metadata or {}, "streams": {}}
+        self.buffers: Dict[str, List[np.ndarray]] = {}
+        self.buffered: Dict[str, int] = {}
+
+    def append(self, stream: str, data: np.ndarray, columns: Sequence[str]) -> None:
+        """
+        Append rows to a stream. Full chunks are compressed and written right away.
+        :param stream: name of the stream, e.g. 'frames' or 'quaternions/C7'.
+        :type stream: str
+        :param data: rows to append, sorted by time.
+        :type data: np.ndarray
+        :param columns: name of each column, the first one being the time.
+        :type columns: Sequence[str]
+        """
+        data = np.atleast_2d(np.asarray(data, dtype=float))
+        self.index["streams"].setdefault(stream, {"columns": list(columns), "chunks": []})
+        self.buffers.setdefault(stream, []).append(data)
+        self.buffered[stream] = self.buffered.get(stream, 0) + len(data)
+        if self.buffered[stream] >= self.chunk_size:
+            rows = np.concatenate(self.buffers[stream])
+            full = len(rows) - len(rows) % self.chunk_size
+            for start in range(0, full, self.chunk_size):
+                self._write_chunk(stream, rows[start:start + self.chunk_size])
+            self.buffers[stream] = [rows[full:]] if full < len(rows) else []
+            self.buffered[stream] = len(rows) - full
+            self._write_index()
+
+    def close(self) -> None:
+        """Write the remaining rows of every stream and the index."""
+        for stream, buffer in self.buffers.items():
+            if buffer:
+                self._write_chunk(stream, np.concatenate(buffer))
+        self.buffers.clear()
+        self.buffered.clear()
+        self._write_index()
+
+    def _write_chunk(self, stream: str, rows: np.ndarray) -> None:
+        chunks = self.index["streams"][stream]["chunks"]
+        name = f"{stream}/{len(chunks):06d}.npz"
+        (self.path / name).parent.mkdir(parents=True, exist_ok=True)
+        np.savez_compressed(self.path / name, data=rows)
+        chunks.append({"file": name, "start": float(rows[0, 0]), "end": float(rows[-1, 0]), "rows": len(rows)})
+
+    def _write_index(self) -> None:
+        tmp = self.path / (INDEX_FILE + ".tmp")
+        tmp.write_text(json.dumps(self.index, indent=1), encoding="utf-8")
+        os.replace(tmp, self.path / INDEX_FILE)
+
+
+class SessionArchive:
+    """
+    Read an archive written by SessionWriter. Range queries only decompress the chunks overlapping the range.
+    """
+
+    def __init__(self, root: Path) -> None:
+        """
+        :param root: directory of the archive.
+        :type root: Path
+        """
+        self.root = Path(root)
+        self._indexes: Dict[str, Dict[str, Any]] = {}
+
+    def sessions(self) -> List[str]:
+        """Return the names of the archived sessions."""
+        return sorted(p.parent.name for p in self.root.glob(f"*/{INDEX_FILE}"))
+
+    def index(self, session: str) -> Dict[str, Any]:
+        """Return the index of a session."""
+        if session not in self._indexes:
+            self._indexes[session] = json.loads((self.root / session / INDEX_FILE).read_text(encoding="utf-8"))
+        return self._indexes[session]
+
+    def metadata(self, session: str) -> Dict[str, Any]:
+        """Return the metadata of a session."""
+        return self.index(session)["metadata"]
+
+    def streams(self, session: str) -> List[str]:
+        """Return the names of the streams of a session."""
+        return list(self.index(session)["streams"])
+
+    def columns(self, session: str, stream: str) -> List[str]:
+        """Return the column names of a stream."""
+        return self.index(session)["streams"][stream]["columns"]
+
+    def find_sessions(self, start: float, end: float, **metadata: Any) -> List[str]:
+        """
+        Find the sessions overlapping a range of absolute time.
+        :param start: start of the range, as a UNIX timestamp.
+        :type start: float
+        :param end: end of the range, as a UNIX timestamp.
+        :type end: float
+        :param metadata: metadata the sessions must match, e.g. worker="X".
+        :return: the names of the sessions.
+        :rtype: List[str]
+        """
+        found = []
+        for session in self.sessions():
+            meta = self.metadata(session)
+            if any(meta.get(key) != value for key, value in metadata.items()):
+                continue
+            session_start = meta.get("start_time", 0.0)
+            session_end = session_start + max(
+                (s["chunks"][-1]["end"] for s in self.index(session)["streams"].values() if s["chunks"]), default=0.0
+            )
+            if session_start <= end and session_end >= start:
+                found.append(session)
+        return found
+
+    def query(self, session: str, stream: str, start: float = -np.inf, end: float = np.inf) -> np.ndarray:
+        """
+        Return the rows of a stream whose time is within [start, end].
+        :param session: name of the session.
+        :type session: str
+        :param stream: name of the stream.
+        :type stream: str
+        :param start: start of the range, in seconds since the start of the session.
+        :type start: float
+        :param end: end of the range, in seconds since the start of the session.
+        :type end: float
+        :return: the rows, with the columns given by columns().
+        :rtype: np.ndarray
+        """
+        info = self.index(session)["streams"][stream]
+        chunks = info["chunks"]
+        starts = np.array([c["start"] for c in chunks])
+        ends = np.array([c["end"] for c in chunks])
+        # Chunks are sorted by time: skip those ending before the range and those starting after it.
+        first = int(np.searchsorted(ends, start, side="left"))
+        last = int(np.searchsorted(starts, end, side="right"))
+
+        parts = []
+        for chunk in chunks[first:last]:
+            with np.load(self.root / session / chunk["file"]) as npz:
+                rows = npz["data"]
+            parts.append(rows[(rows[:, 0] >= start) & (rows[:, 0] <= end)])
+        if not parts:
+            return np.empty((0, len(info["columns"])))
+        return np.concatenate(parts)
+
+    def query_absolute(self, session: str, stream: str, start: float, end: float) -> np.ndarray:
+        """
+        Same as query, with the range given as UNIX timestamps.
+        """
+        offset = self.metadata(session).get("start_time", 0.0)
+        return self.query(session, stream, start - offset, end - offset)
@@ -2,26 +2,29 @@
 
 from collections import UserList
 from csv import writer
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import List
+from typing import List, Tuple
 
 import numpy as np
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, eq=False)
 class Frame:
-    """Frame class for data management."""
+    """
+    Frame class for data management.
+    The angle of each coordinate is stored in a single vector, in the order given by names.
+    """
 
     time: float = 0.0
-    right_abduction: float = 0.0
-    right_flexion: float = 0.0
-    right_rotation: float = 0.0
-    right_elevation: float = 0.0
-    left_abduction: float = 0.0
-    left_flexion: float = 0.0
-    left_rotation: float = 0.0
-    left_elevation: float = 0.0
+    values: np.ndarray = field(default_factory=lambda: np.zeros(0))
+    names: Tuple[str, ...] = ()
+
+    def __getattr__(self, name: str) -> float:
+        names = self.__dict__.get("names", ())
+        if name not in names:
+            raise AttributeError(f"'Frame' object has no attribute '{name}'")
+        return self.values[names.index(name)]
 
     def __lt__(self, other):
         return self.time < other.time
@@ -34,13 +37,7 @@ class Frame:
 
     def to_numpy(self):
         """Converts frame to numpy array."""
-        return np.array(
-            [
-                self.time, self.right_abduction, self.right_flexion,
-                self.right_rotation, self.right_elevation, self.left_abduction,
-                self.left_flexion, self.left_rotation, self.left_elevation
-            ]
-        )
+        return np.concatenate(([self.time], self.values))
 
 
 class FrameCollection(UserList):
@@ -54,12 +51,16 @@ class FrameCollection(UserList):
         flushed_data, self.data = self.data[:num], self.data[num:]
         return FrameCollection(flushed_data)
 
+    def columns(self) -> List[str]:
+        """Return the header of the CSV file."""
+        return ["time", *self.data[0].names]
+
     def to_csv(self, path: Path, mode: str = "w", header: bool = True) -> None:
         """Write the data to a CSV file."""
         with path.open(mode=mode, encoding="utf-8", newline='\n') as file_ptr:
             wrt = writer(file_ptr)
             if header:
-                wrt.writerow(Frame.__annotations__.keys())
+                wrt.writerow(self.columns())
             for frame in self.data:
                 wrt.writerow(frame.to_numpy())
 
@@ -57,9 +57,13 @@ class IMUCollection(UserList):
         flushed_data, self.data = self.data[:num], self.data[num:]
         return IMUCollection(flushed_data)
 
+    def columns(self) -> List[str]:
+        """Return the header of the CSV file."""
+        return list(self.data[0].__annotations__.keys())
+
     def to_csv(self, path: Path, mode: str = "w", header: bool = True) -> None:
         """Write the data to a CSV file."""
-        header_data = self.data[0].__annotations__.keys()
+        header_data = self.columns()
         with path.open(mode=mode, encoding="utf-8", newline='\n') as file_ptr:
             wrt = writer(file_ptr)
             if header:
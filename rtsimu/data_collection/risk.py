@@ -1,67 +1,39 @@
 """Risk namespace for data management."""
 
-from collections import Counter, UserList
-from dataclasses import dataclass
-from functools import reduce
+from collections import UserList
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import List
+from typing import List, Tuple
 from csv import writer
 
 import numpy as np
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, eq=False)
 class Risk:
-    """Define the data structure for the risk data."""
+    """
+    Define the data structure for the risk data.
+    The risk of each coordinate is stored in a single boolean vector, in the order given by names.
+    """
 
     time: float = 0.0
-    right_abduction: bool = False
-    right_flexion: bool = False
-    right_rotation: bool = False
-    right_elevation: bool = False
-    left_abduction: bool = False
-    left_flexion: bool = False
-    left_rotation: bool = False
-    left_elevation: bool = False
+    values: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=bool))
+    names: Tuple[str, ...] = ()
+
+    def __getattr__(self, name: str) -> bool:
+        names = self.__dict__.get("names", ())
+        if name not in names:
+            raise AttributeError(f"'Risk' object has no attribute '{name}'")
+        return bool(self.values[names.index(name)])
 
     def __and__(self, other: "Risk"):
-        return Risk(
-            time=self.time,
-            right_abduction=self.right_abduction and other.right_abduction,
-            right_flexion=self.right_flexion and other.right_flexion,
-            right_rotation=self.right_rotation and other.right_rotation,
-            right_elevation=self.right_elevation and other.right_elevation,
-            left_abduction=self.left_abduction and other.left_abduction,
-            left_flexion=self.left_flexion and other.left_flexion,
-            left_rotation=self.left_rotation and other.left_rotation,
-            left_elevation=self.left_elevation and other.left_elevation,
-        )
+        return Risk(time=self.time, values=self.values & other.values, names=self.names)
 
     def __or__(self, other: "Risk"):
-        return Risk(
-            time=self.time,
-            right_abduction=self.right_abduction or other.right_abduction,
-            right_flexion=self.right_flexion or other.right_flexion,
-            right_rotation=self.right_rotation or other.right_rotation,
-            right_elevation=self.right_elevation or other.right_elevation,
-            left_abduction=self.left_abduction or other.left_abduction,
-            left_flexion=self.left_flexion or other.left_flexion,
-            left_rotation=self.left_rotation or other.left_rotation,
-            left_elevation=self.left_elevation or other.left_elevation,
-        )
+        return Risk(time=self.time, values=self.values | other.values, names=self.names)
 
     def __invert__(self):
-        return Risk(
-            time=self.time,
-            right_abduction=not self.right_abduction,
-            right_flexion=not self.right_flexion,
-            right_rotation=not self.right_rotation,
-            right_elevation=not self.right_elevation,
-            left_abduction=not self.left_abduction,
-            left_flexion=not self.left_flexion,
-            left_rotation=not self.left_rotation,
-            left_elevation=not self.left_elevation,
-        )
+        return Risk(time=self.time, values=~self.values, names=self.names)
 
     def to_numpy(self) -> np.ndarray:
         """
@@ -69,25 +41,14 @@ class Risk:
             :return: A numpy array with the data.
             :rtype: np.ndarray
         """
-        return np.array([
-            self.time,
-            self.right_abduction,
-            self.right_flexion,
-            self.right_rotation,
-            self.right_elevation,
-            self.left_abduction,
-            self.left_flexion,
-            self.left_rotation,
-            self.left_elevation
-        ])
+        return np.concatenate(([self.time], self.values))
 
     def __repr__(self):
         return str(self)
 
     def __str__(self):
-        return f"Risk(time={self.time}, right_abduction={self.right_abduction}, right_flexion={self.right_flexion}, right_rotation" \
-               f"={self.right_rotation}, right_elevation={self.right_elevation}, left_abduction={self.left_abduction}, left_flexion" \
-               f"={self.left_flexion}, left_rotation={self.left_rotation}, left_elevation={self.left_elevation})"
+        values = ", ".join(f"{name}={bool(value)}" for name, value in zip(self.names, self.values))
+        return f"Risk(time={self.time}, {values})"
 
 
 class RiskCollection(UserList):
@@ -117,33 +78,35 @@ class RiskCollection(UserList):
 
         def logical_and(self) -> Risk:
             """Return the logical and of all the risks."""
-            return reduce(lambda x, y: x & y, self.data)
+            values = np.logical_and.reduce([d.values for d in self.data])
+            return Risk(time=self.data[0].time, values=values, names=self.data[0].names)
 
         def logical_or(self) -> Risk:
             """Return the logical or of all the risks."""
-            return reduce(lambda x, y: x | y, self.data)
+            values = np.logical_or.reduce([d.values for d in self.data])
+            return Risk(time=self.data[0].time, values=values, names=self.data[0].names)
 
         def most_common(self) -> Risk:
-            """Return the most common value of all the risks."""
+            """Return the most common value of all the risks. Ties are resolved with the value of the first risk."""
+            values = np.stack([d.values for d in self.data])
+            votes = 2 * values.sum(axis=0)
             return Risk(
                 time=self.data[0].time,
-                right_abduction=Counter([d.right_abduction for d in self.data]).most_common(1)[0][0],
-                right_flexion=Counter([d.right_flexion for d in self.data]).most_common(1)[0][0],
-                right_rotation=Counter([d.right_rotation for d in self.data]).most_common(1)[0][0],
-                right_elevation=Counter([d.right_elevation for d in self.data]).most_common(1)[0][0],
-                left_abduction=Counter([d.left_abduction for d in self.data]).most_common(1)[0][0],
-                left_flexion=Counter([d.left_flexion for d in self.data]).most_common(1)[0][0],
-                left_rotation=Counter([d.left_rotation for d in self.data]).most_common(1)[0][0],
-                left_elevation=Counter([d.left_elevation for d in self.data]).most_common(1)[0][0],
+                values=np.where(votes == len(values), values[0], votes > len(values)),
+                names=self.data[0].names,
             )
 
     def aggregate(self) -> Aggregation:
         """Return an aggregation of the data."""
         return self.Aggregation(self.data)
 
+    def columns(self) -> List[str]:
+        """Return the header of the CSV file."""
+        return ["time", *self.data[0].names]
+
     def to_csv(self, path: Path, mode: str = "w", header: bool = True) -> None:
         """Write the data to a CSV file."""
-        header_data = self.data[0].__annotations__.keys()
+        header_data = self.columns()
         with path.open(mode=mode, encoding="utf-8", newline='\n') as file_ptr:
             wrt = writer(file_ptr)
             if header:
@@ -0,0 +1,38 @@
+"""Storage namespace for writing the collections to disk."""
+
+import csv
+import logging as log
+import time
+from pathlib import Path
+from typing import Union
+
+from .frames import FrameCollection
+from .imu import IMUCollection
+from .risk import RiskCollection
+
+
+def write_data(path: Path, data: Union[FrameCollection, IMUCollection, RiskCollection]) -> None:
+    """
+    Write data to file. Open file in append mode if it exists with the same columns, otherwise open in write mode.
+    An existing file with other columns, e.g. written before a coordinate was added to the tracked coordinates, is
+    renamed to <name>.<modification time>.csv first, so the rows of a file always match its header.
+
+    :param path: path to write to.
+    :type path: Path
+    :param data: data to write.
+    :type data: Union[FrameCollection, IMUCollection, RiskCollection]
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    append = False
+    if path.exists():
+        with path.open(encoding="utf-8", newline="") as file_ptr:
+            header = next(csv.reader(file_ptr), None)
+        append = header == data.columns()
+        if header and not append:
+            stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(path.stat().st_mtime))
+            moved = path.with_name(f"{path.stem}.{stamp}{path.suffix}")
+            path.rename(moved)
+            log.getLogger("STORAGE").warning(
+                "The columns of %s changed, the previous file was moved to %s.", path, moved.name
+            )
+    data.to_csv(path, mode="a" if append else "w", header=not append)
@@ -0,0 +1,173 @@
+"""Edge node: fuse the sensors of a wearer and stream the orientations to the central node."""
+
+import logging as log
+import multiprocessing as mp
+import socket
+import time
+from collections import deque
+from operator import attrgetter
+from pathlib import Path
+from typing import Deque, Dict, Tuple
+
+import hydra
+import numpy as np
+import pandas as pd
+
+from config_store import EdgeBaseConfig, register_configs
+from config_store.network_schema import EdgeConfig
+from sensor import start_sensor_processes
+from transport import END, MAX_BATCH_ROWS, encode_batch, encode_hello, encode_message
+from utils import HOT_PATH, RateLimiter, SamplingFilter, start_log_listener, stop_log_listener
+
+# Register hydra config classes
+register_configs()
+
+is_enabled = attrgetter("enabled")
+get_details = attrgetter("name", "frame")
+
+
+class EdgeClient:
+    """
+    Send batches of quaternions to the central node. While the central node is unreachable, batches are kept in a
+    backlog and the connection is retried. After each reconnection, the backlog is sent again: the central node drops
+    the batches it already received by their sequence number.
+    """
+
+    def __init__(self, config: EdgeConfig, sensors: Dict[str, str]) -> None:
+        """
+        :param config: edge node configuration.
+        :type config: EdgeConfig
+        :param sensors: model frame of each sensor, in the order of the quaternions of the batches.
+        :type sensors: Dict[str, str]
+        """
+        self.logger = log.getLogger("EDGE")
+        self.config = config
+        self.hello = encode_hello(config.wearer, time.time(), sensors)
+        self.socket: socket.socket = None
+        self.reconnect = RateLimiter(1 / config.reconnect_interval if config.reconnect_interval > 0 else 0)
+        self.backlog: Deque[Tuple[int, bytes]] = deque(maxlen=max(config.backlog, 1))
+        self.sequence = 0
+        self.sent = -1
+        self.bytes_sent = 0
+
+    def send(self, times: np.ndarray, quaternions: np.ndarray) -> None:
+        """
+        Queue a batch and send every batch not sent yet, if connected.
+        :param times: time of each row.
+        :type times: np.ndarray
+        :param quaternions: quaternions w, x, y, z with the shape (rows, sensors, 4).
+        :type quaternions: np.ndarray
+        """
+        for start in range(0, len(times), MAX_BATCH_ROWS):
+            end = start + MAX_BATCH_ROWS
+            self.backlog.append((self.sequence, encode_batch(self.sequence, times[start:end], quaternions[start:end])))
+            self.sequence += 1
+        self.flush()
+
+    def flush(self, force: bool = False) -> bool:
+        """
+        Send the batches not sent yet on the current connection, connecting first if needed.
+        :param force: connect even if the last attempt was less than reconnect_interval ago.
+        :type force: bool
+        :return: whether every batch was sent.
+        :rtype: bool
+        """
+        if self.socket is None and not (self.reconnect.ready() or force):
+            return False
+        try:
+            if self.socket is None:
+                self.socket = socket.create_connection((self.config.host, self.config.port), timeout=5.0)
+                # The timeout only bounds the connection: the central node slows the edge node down by blocking
+                # sendall, which must not be mistaken for a lost connection.
+                self.socket.settimeout(None)
+                self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                self.socket.sendall(self.hello)
+                # Send the whole backlog again, whatever reached the central node before.
+                self.sent = -1
+                self.logger.info("Connected to %s:%d.", self.config.host, self.config.port)
+            for sequence, message in self.backlog:
+                if sequence > self.sent:
+                    self.socket.sendall(message)
+                    self.sent = sequence
+                    self.bytes_sent += len(message)
+            return True
+        except OSError as error:
+            self.logger.warning("Central node unreachable, keeping %d batches: %s", len(self.backlog), error)
+            self._disconnect()
+            return False
+
+    def close(self) -> None:
+        """Send the remaining batches and the end of the stream, then disconnect."""
+        if self.flush(force=True):
+            try:
+                self.socket.sendall(encode_message(END))
+            except OSError as error:
+                self.logger.warning("Could not send the end of the stream: %s", error)
+        else:
+            self.logger.error(
+                "%d batches could not be sent.", sum(sequence > self.sent for sequence, _ in self.backlog)
+            )
+        self._disconnect()
+
+    def _disconnect(self) -> None:
+        if self.socket is not None:
+            self.socket.close()
+            self.socket = None
+
+
+@hydra.main(config_path=Path("rtsimu/config").absolute().as_posix(), config_name="edge", version_base=None)
+def main(config: EdgeBaseConfig):
+    """Edge function."""
+    log_queue = mp.Queue() if config.log.mode == "queue" else None
+    log_listener = start_log_listener(log_queue) if log_queue is not None else None
+    try:
+        logger = log.getLogger("MAIN")
+        logger.addFilter(SamplingFilter(config.log.sample_interval))
+
+        sensor_details = dict(map(get_details, filter(is_enabled, config.sensor.sensors)))
+        usage_queue = mp.Queue()
+        processes, queues = start_sensor_processes(config, log_queue, usage_queue)
+        logger.info("%d Sensor processes initialized: %s", len(processes), ", ".join(processes.keys()))
+
+        client = EdgeClient(config.edge, {name: sensor_details[name] for name in processes})
+        client.flush(force=True)
+        num_rows = len(pd.read_csv(Path(config.sensor.data_sensors) / f"{list(processes)[-1]}.csv"))
+        batch_size = max(config.edge.batch_size, 1)
+        times = np.empty(batch_size)
+        quaternions = np.empty((batch_size, len(queues), 4))
+        rows = 0
+        batch_start = 0.0
+
+        logger.info("Streaming wearer %s to %s:%d.", config.edge.wearer, config.edge.host, config.edge.port)
+        for i in range(num_rows):
+            for j, q in enumerate(queues.values()):
+                qdata = q.get()[-1]
+                quaternions[rows, j] = qdata.w, qdata.x, qdata.y, qdata.z
+            times[rows] = qdata.time
+            if rows == 0:
+                batch_start = time.monotonic()
+            rows += 1
+
+            if rows == batch_size or time.monotonic() - batch_start >= config.edge.max_delay:
+                client.send(times[:rows], quaternions[:rows])
+                rows = 0
+                logger.info("Frames streamed: %d", i + 1, extra=HOT_PATH)
+
+        if rows:
+            client.send(times[:rows], quaternions[:rows])
+        client.close()
+        logger.info("%d frames streamed in %d batches (%d bytes).", num_rows, client.sequence, client.bytes_sent)
+
+        for _ in processes:
+            usage_queue.get()
+        for process in processes.values():
+            process.join()
+        logger.info("Terminating process.")
+    finally:
+        if log_listener is not None:
+            stop_log_listener(log_listener)
+
+
+if __name__ == "__main__":
+    mp.set_start_method("spawn")
+    main()
@@ -1,7 +1,12 @@
+import logging as log
+
 from data_collection.risk import Risk
 from data_collection.frames import Frame
-from utils.eval import safe_eval
+from utils.eval import compile_expression
 from enum import Enum, unique
+from typing import Any, Callable, Dict, List, Mapping, Sequence, Tuple
+
+import numpy as np
 
 
 @unique
@@ -16,36 +21,72 @@ class RiskLevel(Enum):
 class Evaluator:
     """
     Class for evaluating risk.
+    Rules are parsed once and coordinates sharing the same rule are evaluated together as a single array operation.
     """
 
-    def __init__(self, severe_rules, moderate_rules) -> None:
-        self.sev_risk_rules = severe_rules
-        self.mod_risk_rules = moderate_rules
+    def __init__(
+            self, severe_rules: Mapping[str, str], moderate_rules: Mapping[str, str], names: Sequence[str]
+    ) -> None:
+        """
+        :param severe_rules: severe risk rule of each coordinate, where @value stands for the angle.
+        :type severe_rules: Mapping[str, str]
+        :param moderate_rules: moderate risk rule of each coordinate, where @value stands for the angle.
+        :type moderate_rules: Mapping[str, str]
+        :param names: names of the coordinates, in the order of the frame values. Coordinates without a rule are
+            never at risk, and a warning is logged for each of them.
+        :type names: Sequence[str]
+        :raises ValueError: if a rule is given for a coordinate that is not tracked, e.g. a misspelled name.
+        """
+        self.names = tuple(names)
+        self.sev_risk_rules = self._compile(severe_rules, "severe")
+        self.mod_risk_rules = self._compile(moderate_rules, "moderate")
+
+    def _compile(self, rules: Mapping[str, str], level: str) -> List[Tuple[Callable[..., Any], np.ndarray]]:
+        """Check the rules against the coordinates, group the coordinates by rule and parse each rule once."""
+        unknown = [name for name in rules if name not in self.names]
+        if unknown:
+            raise ValueError(
+                f"{level.capitalize()} risk rules for coordinates that are not tracked: {', '.join(unknown)}. "
+                f"Tracked coordinates: {', '.join(self.names)}"
+            )
+        missing = [name for name in self.names if not rules.get(name)]
+        if missing:
+            log.getLogger("EVALUATOR").warning(
+                "No %s risk rule for %s: never at %s risk.", level, ", ".join(missing), level
+            )
+
+        groups: Dict[str, List[int]] = {}
+        for i, name in enumerate(self.names):
+            rule = rules.get(name)
+            if rule:
+                groups.setdefault(rule, []).append(i)
+        return [
+            (compile_expression(rule.replace("@value", "value")), np.array(indices))
+            for rule, indices in groups.items()
+        ]
+
+    def evaluate(self, values: np.ndarray, level: RiskLevel) -> np.ndarray:
+        """
+        Evaluate the rules of a risk level over the angles of one or many frames.
+        :param values: angles, with the coordinates along the last axis.
+        :type values: np.ndarray
+        :param level: risk level whose rules are evaluated.
+        :type level: RiskLevel
+        :return: boolean risk of each coordinate, same shape as values.
+        :rtype: np.ndarray
+        """
+        risk = np.zeros(np.shape(values), dtype=bool)
+        if level is RiskLevel.NONE:
+            return risk
+        rules = self.sev_risk_rules if level is RiskLevel.SEVERE else self.mod_risk_rules
+        for rule, indices in rules:
+            risk[..., indices] = rule(value=values[..., indices])
+        return risk
 
     def eval_sev_risk(self, frame: Frame) -> Risk:
         """Evaluate a frame using severe risk rules."""
-        return Risk(
-            time=frame.time,
-            right_abduction=safe_eval(self.sev_risk_rules.right_abduction.replace("@value", str(frame.right_abduction))),
-            right_flexion=safe_eval(self.sev_risk_rules.right_flexion.replace("@value", str(frame.right_flexion))),
-            right_rotation=safe_eval(self.sev_risk_rules.right_rotation.replace("@value", str(frame.right_rotation))),
-            right_elevation=safe_eval(self.sev_risk_rules.right_elevation.replace("@value", str(frame.right_elevation))),
-            left_abduction=safe_eval(self.sev_risk_rules.left_abduction.replace("@value", str(frame.left_abduction))),
-            left_flexion=safe_eval(self.sev_risk_rules.left_flexion.replace("@value", str(frame.left_flexion))),
-            left_rotation=safe_eval(self.sev_risk_rules.left_rotation.replace("@value", str(frame.left_rotation))),
-            left_elevation=safe_eval(self.sev_risk_rules.left_elevation.replace("@value", str(frame.left_elevation))),
-        )
+        return Risk(time=frame.time, values=self.evaluate(frame.values, RiskLevel.SEVERE), names=self.names)
 
     def eval_mod_risk(self, frame: Frame) -> Risk:
         """Evaluate moderate risk."""
-        return Risk(
-            time=frame.time,
-            right_abduction=safe_eval(self.mod_risk_rules.right_abduction.replace("@value", str(frame.right_abduction))),
-            right_flexion=safe_eval(self.mod_risk_rules.right_flexion.replace("@value", str(frame.right_flexion))),
-            right_rotation=safe_eval(self.mod_risk_rules.right_rotation.replace("@value", str(frame.right_rotation))),
-            right_elevation=safe_eval(self.mod_risk_rules.right_elevation.replace("@value", str(frame.right_elevation))),
-            left_abduction=safe_eval(self.mod_risk_rules.left_abduction.replace("@value", str(frame.left_abduction))),
-            left_flexion=safe_eval(self.mod_risk_rules.left_flexion.replace("@value", str(frame.left_flexion))),
-            left_rotation=safe_eval(self.mod_risk_rules.left_rotation.replace("@value", str(frame.left_rotation))),
-            left_elevation=safe_eval(self.mod_risk_rules.left_elevation.replace("@value", str(frame.left_elevation))),
-        )
\ No newline at end of file
+        return Risk(time=frame.time, values=self.evaluate(frame.values, RiskLevel.MODERATE), names=self.names)
@@ -0,0 +1,119 @@
+"""Geometry preprocessing for faster model loading."""
+
+import argparse
+import re
+from pathlib import Path
+from typing import Dict
+
+import vtk
+
+MESH_FILE_PATTERN = re.compile(r"<mesh_file>\s*([^<\s]+)\s*</mesh_file>")
+LOD_SUFFIX = ".lod"
+
+
+def lod_name(path: Path) -> Path:
+    """
+    Name of the decimated counterpart of a file, e.g. 'humerus_rv.vtp' -> 'humerus_rv.lod.vtp'.
+    :param path: path of the original file.
+    :type path: Path
+    :return: path of the decimated file, in the same directory as the original.
+    :rtype: Path
+    """
+    return path.with_name(path.stem + LOD_SUFFIX + path.suffix)
+
+
+def find_mesh(model_dir: Path, mesh_file: str) -> Path:
+    """
+    Locate a mesh file the same way OpenSim does: relative to the model and then in its Geometry folder.
+    :param model_dir: directory of the .osim model.
+    :type model_dir: Path
+    :param mesh_file: mesh file referenced by the model.
+    :type mesh_file: str
+    :return: path to the mesh file, or None if it was not found.
+    :rtype: Path
+    """
+    for candidate in (Path(mesh_file), model_dir / mesh_file, model_dir / "Geometry" / mesh_file):
+        if candidate.is_file():
+            return candidate
+    return None
+
+
+def decimate_mesh(source: Path, target: Path, reduction: float) -> None:
+    """
+    Decimate a .vtp mesh and write it as ASCII, the only format read by the Simbody visualizer (see
+    Geometry/vtpbinary2ascii.py).
+    :param source: original mesh.
+    :type source: Path
+    :param target: path of the decimated mesh.
+    :type target: Path
+    :param reduction: fraction of triangles to remove, between 0 and 1.
+    :type reduction: float
+    """
+    reader = vtk.vtkXMLPolyDataReader()
+    reader.SetFileName(source.as_posix())
+
+    triangles = vtk.vtkTriangleFilter()
+    triangles.SetInputConnection(reader.GetOutputPort())
+
+    decimate = vtk.vtkQuadricDecimation()
+    decimate.SetInputConnection(triangles.GetOutputPort())
+    decimate.SetTargetReduction(reduction)
+
+    normals = vtk.vtkPolyDataNormals()
+    normals.SetInputConnection(decimate.GetOutputPort())
+    normals.ComputePointNormalsOn()
+    normals.SplittingOff()
+
+    writer = vtk.vtkXMLPolyDataWriter()
+    writer.SetFileName(target.as_posix())
+    writer.SetInputConnection(normals.GetOutputPort())
+    writer.SetDataModeToAscii()
+    writer.Write()
+
+
+def preprocess_model(model_path: Path, reduction: float, force: bool = False) -> Path:
+    """
+    Decimate every mesh referenced by a model and write a copy of the model that uses the decimated meshes.
+    Decimated meshes are cached next to the originals and only rebuilt when the original is newer.
+    :param model_path: path to the .osim model.
+    :type model_path: Path
+    :param reduction: fraction of triangles to remove, between 0 and 1.
+    :type reduction: float
+    :param force: rebuild the cached meshes even if they are up to date.
+    :type force: bool
+    :return: path to the model using the decimated meshes.
+    :rtype: Path
+    """
+    model_dir = model_path.parent
+    model = model_path.read_text(encoding="utf-8")
+    replacements: Dict[str, str] = {}
+
+    for mesh_file in sorted(set(MESH_FILE_PATTERN.findall(model))):
+        source = find_mesh(model_dir, mesh_file)
+        if source is None:
+            print(f"Mesh not found, keeping original reference: {mesh_file}")
+            continue
+        target = lod_name(source)
+        if force or not target.exists() or target.stat().st_mtime < source.stat().st_mtime:
+            print(f"Decimating {source} -> {target}")
+            decimate_mesh(source, target, reduction)
+        replacements[mesh_file] = lod_name(Path(mesh_file)).as_posix()
+
+    lod_model = MESH_FILE_PATTERN.sub(
+        lambda m: f"<mesh_file>{replacements.get(m.group(1), m.group(1))}</mesh_file>", model
+    )
+    lod_model_path = lod_name(model_path)
+    lod_model_path.write_text(lod_model, encoding="utf-8")
+    return lod_model_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build decimated geometry for an OpenSim model.")
+    parser.add_argument("model_path", type=Path, help="path to the .osim model.")
+    parser.add_argument(
+        "--reduction", type=float, default=0.75, help="fraction of triangles to remove (default: 0.75)."
+    )
+    parser.add_argument("--force", action="store_true", help="rebuild meshes even if they are cached.")
+    args = parser.parse_args()
+
+    print(f"Model with decimated geometry written to {preprocess_model(args.model_path, args.reduction, args.force)}")
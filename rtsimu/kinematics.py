@@ -0,0 +1,83 @@
+"""Inverse kinematics of the OpenSim model from the sensor orientations."""
+
+from typing import Dict, Sequence
+
+import numpy as np
+import opensim as osim
+
+from config_store.opensim_schema import OpensimConfig
+from utils import safe_eval
+
+RAD2DEG = 180 / np.pi
+
+
+class InverseKinematics:
+    """
+    Solve the coordinates of the OpenSim model from the orientation of the sensors, one frame at a time.
+    """
+
+    def __init__(self, config: OpensimConfig, visualize: bool = False) -> None:
+        """
+        :param config: OpenSim configuration.
+        :type config: OpensimConfig
+        :param visualize: whether to enable the model visualizer.
+        :type visualize: bool
+        """
+        self.sensor2osim = osim.Rotation(
+            osim.SpaceRotationSequence,
+            float(safe_eval(str(config.sensor_to_opensim_rotation.x))),
+            osim.CoordinateAxis(0),
+            float(safe_eval(str(config.sensor_to_opensim_rotation.y))),
+            osim.CoordinateAxis(1),
+            float(safe_eval(str(config.sensor_to_opensim_rotation.z))),
+            osim.CoordinateAxis(2)
+        )
+        self.accuracy = config.ik_accuracy
+        self.model = osim.Model(config.model_path)
+        self.model.setUseVisualizer(visualize)
+        self.state = self.model.initSystem()
+        coordinates = {name: coord for name, coord in config.coordinates.items() if coord is not None}
+        self.names = tuple(coordinates)
+        self.coordinates = [self.model.getCoordinateSet().get(coord) for coord in coordinates.values()]
+
+    def reset(self) -> None:
+        """Start tracking from the default pose of the model, e.g. before a new recording."""
+        self.state = self.model.initializeState()
+
+    def snapshot(self) -> np.ndarray:
+        """Return a copy of the generalized coordinates of the current state, e.g. to draw it from another thread."""
+        q = self.state.getQ()
+        return np.array([q.get(i) for i in range(q.size())])
+
+    def solve(self, time: float, orientations: Dict[str, Sequence[float]]) -> np.ndarray:
+        """
+        Track the model to the orientations of one frame.
+        :param time: time of the frame.
+        :type time: float
+        :param orientations: quaternion (w, x, y, z) of each sensor, keyed by the name of its frame in the model.
+        :type orientations: Dict[str, Sequence[float]]
+        :return: value of each coordinate in degrees, in the order of names.
+        :rtype: np.ndarray
+        """
+        qtable = osim.TimeSeriesTableQuaternion([time])
+        for frame_name, (w, x, y, z) in orientations.items():
+            qtable.appendColumn(
+                frame_name, osim.VectorQuaternion(1, osim.Quaternion(float(w), float(x), float(y), float(z)))
+            )
+
+        # Convert to OpenSim rotation.
+        osim.OpenSenseUtilities.rotateOrientationTable(qtable, self.sensor2osim)
+
+        ik_solver = osim.InverseKinematicsSolver(
+            self.model,
+            osim.MarkersReference(),
+            osim.OrientationsReference(osim.OpenSenseUtilities.convertQuaternionsToRotations(qtable)),
+            osim.SimTKArrayCoordinateReference()
+        )
+        if self.accuracy > 0:
+            ik_solver.setAccuracy(self.accuracy)
+        self.state.setTime(time)
+        ik_solver.assemble(self.state)
+        ik_solver.track(self.state)
+
+        return np.array([coord.getValue(self.state) for coord in self.coordinates]) * RAD2DEG
@@ -1,20 +1,31 @@
+import json
 import logging as log
 import multiprocessing as mp
 import hydra
 import numpy as np
 import opensim as osim  
 import pandas as pd
+import time
+import uuid
 from pathlib import Path
-from typing import Union
+from typing import Any, Dict, List
 from operator import attrgetter
 
+from alerts import AlertDispatcher
 from config_store import BaseConfig, register_configs
+from data_collection.archive import SessionWriter
 from data_collection.frames import Frame, FrameCollection
 from data_collection.imu import IMUCollection
 from data_collection.risk import Risk, RiskCollection
+from data_collection.storage import write_data
 from evaluator import Evaluator, RiskLevel
-from sensor import sensor_process
-from utils import safe_eval
+from kinematics import InverseKinematics
+from pipeline import Pipeline
+from sensor import start_sensor_processes
+from utils import (
+    HOT_PATH, SamplingFilter, apply_scheduling, process_usage, start_log_listener, stop_log_listener
+)
+from visualizer import Visualizer
 
 osim.Logger_setLevelString("Warn")
 
@@ -24,145 +35,231 @@ register_configs()
 is_enabled = attrgetter("enabled")
 get_details = attrgetter("name", "frame")
 
-RAD2DEG = 180 / np.pi
-
-def write_data(path: Path, data: Union[FrameCollection, IMUCollection, RiskCollection]) -> None:
+def write_run_summary(
+        path: Path, num_frames: int, ik_latencies: List[float], usage: List[Dict[str, Any]], seconds: float = 0.0,
+        threaded: bool = True
+) -> None:
     """
-    Write data to file. Open file in append mode if it exists, otherwise open in write mode.
+    Write the summary of a run: number of frames, throughput, latency of the inverse kinematics and usage of each
+    process.
 
     :param path: path to write to.
     :type path: Path
-    :param data: data to write.
-    :type data: Union[FrameCollection, IMUCollection, RiskCollection]
+    :param num_frames: number of frames processed.
+    :type num_frames: int
+    :param ik_latencies: duration of the inverse kinematics of each frame, in seconds.
+    :type ik_latencies: List[float]
+    :param usage: CPU usage of each process, as returned by process_usage.
+    :type usage: List[Dict[str, Any]]
+    :param seconds: duration of the pipeline, to compare the throughput with and without pipeline.enabled.
+    :type seconds: float
+    :param threaded: whether the pipeline stages ran in threads.
+    :type threaded: bool
     """
+    latencies = np.array(ik_latencies) * 1000
+    summary = {
+        "frames": num_frames,
+        "pipeline": {
+            "threaded": threaded,
+            "seconds": seconds,
+            "frames_per_second": num_frames / seconds if seconds else 0.0,
+        },
+        "ik_latency_ms": {
+            "mean": float(latencies.mean()),
+            "p50": float(np.percentile(latencies, 50)),
+            "p99": float(np.percentile(latencies, 99)),
+            "max": float(latencies.max()),
+        } if len(latencies) else {},
+        "processes": usage,
+    }
     path.parent.mkdir(parents=True, exist_ok=True)
-    data.to_csv(path, mode="a" if path.exists() else "w", header=not path.exists())
+    path.write_text(json.dumps(summary, indent=2), encoding="utf-8")
+
+def write_archive(
+        config: BaseConfig, start_time: float, quaternions: Dict[str, IMUCollection], frames: FrameCollection,
+        severe_risks: RiskCollection, moderate_risks: RiskCollection
+) -> None:
+    """
+    Save a run as a session of the archive.
+
+    :param config: configuration of the run.
+    :type config: BaseConfig
+    :param start_time: UNIX timestamp of the start of the run.
+    :type start_time: float
+    :param quaternions: quaternions of each sensor.
+    :type quaternions: Dict[str, IMUCollection]
+    :param frames: frames of the run.
+    :type frames: FrameCollection
+    :param severe_risks: severe risk of each frame.
+    :type severe_risks: RiskCollection
+    :param moderate_risks: moderate risk of each frame.
+    :type moderate_risks: RiskCollection
+    """
+    # The random suffix keeps runs started within the same second apart.
+    session = f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(start_time))}-{uuid.uuid4().hex[:8]}"
+    if config.archive.worker:
+        session = f"{session}_{config.archive.worker}"
+    writer = SessionWriter(
+        Path(config.archive.path), session, config.archive.chunk_size,
+        metadata={"worker": config.archive.worker, "start_time": start_time}
+    )
+    for name, collection in quaternions.items():
+        raw = pd.read_csv(config.sensor.data_sensors+name+".csv")
+        writer.append(f"imu/{name}", raw.to_numpy(), ["time", *raw.columns[1:]])
+        writer.append(f"quaternions/{name}", collection.to_numpy(), ["time", "w", "x", "y", "z"])
+    columns = ["time", *frames[0].names]
+    writer.append("frames", frames.to_numpy(), columns)
+    writer.append("severe_risk", severe_risks.to_numpy(), columns)
+    writer.append("moderate_risk", moderate_risks.to_numpy(), columns)
+    writer.close()
 
 @hydra.main(config_path=Path("rtsimu/config").absolute().as_posix(), config_name="config", version_base=None)
 def main(config: BaseConfig):
     """Main function."""
-    logger = log.getLogger("MAIN")
-    logger.info("System started.")
-
-    logger.info("Initializing simulation tool.")
-    sensor2osim = osim.Rotation(
-        osim.SpaceRotationSequence,
-        float(safe_eval(str(config.opensim.sensor_to_opensim_rotation.x))),
-        osim.CoordinateAxis(0),
-        float(safe_eval(str(config.opensim.sensor_to_opensim_rotation.y))),
-        osim.CoordinateAxis(1),
-        float(safe_eval(str(config.opensim.sensor_to_opensim_rotation.z))),
-        osim.CoordinateAxis(2)
-    )
+    log_queue = mp.Queue() if config.log.mode == "queue" else None
+    log_listener = start_log_listener(log_queue) if log_queue is not None else None
+    try:
+        logger = log.getLogger("MAIN")
+        logger.addFilter(SamplingFilter(config.log.sample_interval))
+        logger.info("System started.")
 
-    model = osim.Model(config.opensim.model_path)
-    model.setUseVisualizer(config.opensim.visualize)
-    state = model.initSystem()
-    if config.opensim.visualize:
-        model.getVisualizer().show(state)
-        model.getVisualizer().getSimbodyVisualizer().setShowSimTime(True)
-        model.getVisualizer().getSimbodyVisualizer().setShutdownWhenDestructed(True)
-
-    logger.info("Sensors data processes.")
-    sensor_details = dict(map(get_details, filter(is_enabled, config.sensor.sensors)))
-    num_enabled_sensors = len(sensor_details)
-    barrier = mp.Barrier(num_enabled_sensors)
-    processes = {}
-    queues = {}
-    frame_names = {}
-
-    # Identify and start a process for each sensor.
-    for s in config.sensor.sensors:
-        logger.debug("Starting Sensor data from %s." % s.name)
-        q = mp.Queue()
-        process = mp.Process(
-            target=sensor_process,
-            args=(barrier, s.name, 2, config.sensor.AHRS.settings, q)
-        )
-        processes[s.name] = process
-        queues[s.name] = q
-        frame_names[s.name] = sensor_details[s.name]
-        process.start()
+        logger.info("Initializing simulation tool.")
+        ik = InverseKinematics(config.opensim, visualize=config.opensim.visualize)
+        model, state = ik.model, ik.state
+        visualizer = None
+        if config.opensim.visualize:
+            model.getVisualizer().show(state)
+            model.getVisualizer().getSimbodyVisualizer().setShowSimTime(True)
+            model.getVisualizer().getSimbodyVisualizer().setShutdownWhenDestructed(True)
+            visualizer = Visualizer(model, state, config.opensim.visualizer_refresh_rate)
 
-    logger.info("%d Sensor processes initialized: %s" % (len(processes), ", ".join(processes.keys())))
+        logger.info("Sensors data processes.")
+        sensor_details = dict(map(get_details, filter(is_enabled, config.sensor.sensors)))
+        usage_queue = mp.Queue()
+        processes, queues = start_sensor_processes(config, log_queue, usage_queue)
+        # Only now, so that the sensor processes and the visualizer process do not inherit the IK scheduling.
+        apply_scheduling(config.scheduling.ik_cores, config.scheduling.ik_priority, logger)
+        frame_names = {name: sensor_details[name] for name in processes}
 
-    curr_timestamp = 0.0
-    frame_collection = FrameCollection()
-    risk_evaluator = Evaluator(config.opensim.risk.severe.rules, config.opensim.risk.moderate.rules)
-    severe_risk_collection = RiskCollection()
-    moderate_risk_collection = RiskCollection()
-    severe_risk = Risk()
-    moderate_risk = Risk()
+        logger.info("%d Sensor processes initialized: %s", len(processes), ", ".join(processes.keys()))
 
+        frame_collection = FrameCollection()
+        risk_evaluator = Evaluator(config.opensim.risk.severe.rules, config.opensim.risk.moderate.rules, ik.names)
+        severe_risk_collection = RiskCollection()
+        moderate_risk_collection = RiskCollection()
+        severe_risk = Risk()
+        moderate_risk = Risk()
 
-    quaternion_collection = {k: IMUCollection() for k in sensor_details.keys()}
 
-    df = pd.read_csv(config.sensor.data_sensors+s.name+".csv")
+        quaternion_collection = {k: IMUCollection() for k in sensor_details.keys()}
 
-    logger.info("Running...")
-    
-    while len(frame_collection) < len(df):
-        if any(q.empty() for q in queues.values()):
-            continue
+        df = pd.read_csv(config.sensor.data_sensors+list(processes)[-1]+".csv")
 
-        qtable = osim.TimeSeriesTableQuaternion([curr_timestamp])            
+        def read_sensors():
+            """Pipeline source: wait for the quaternion of every sensor and pack them by model frame."""
+            curr_timestamp = 0.0
+            for _ in range(len(df)):
+                orientations = {}
+                for name, q in queues.items():
+                    qdata = q.get()[-1]
+                    quaternion_collection[name].append(qdata)
+                    orientations[frame_names[name]] = (qdata.w, qdata.x, qdata.y, qdata.z)
+                yield curr_timestamp, orientations
+                curr_timestamp = round(curr_timestamp + 0.5, 2)
 
-        # get quaternion and append to table
-        for name, q in queues.items():
-            qdata = q.get()[-1]
-            quaternion_collection[name].append(qdata)
-            qvector = osim.VectorQuaternion(
-                1,
-                osim.Quaternion(float(qdata.w), float(qdata.x), float(qdata.y), float(qdata.z))
-            )
-            qtable.appendColumn(frame_names[name], qvector)
+        ik_latencies = []
+
+        def solve(item):
+            """Pipeline stage: inverse kinematics."""
+            curr_timestamp, orientations = item
+            start = time.perf_counter()
+            frame = Frame(time=curr_timestamp, values=ik.solve(curr_timestamp, orientations), names=ik.names)
+            ik_latencies.append(time.perf_counter() - start)
+            # Snapshot the pose here: the state is overwritten by the next frame while this one moves down the stages.
+            return frame, ik.snapshot() if visualizer is not None else None
+
+        alerts = AlertDispatcher(config.alerts) if config.alerts.enabled else None
 
-        # Convert to OpenSim rotation.
-        osim.OpenSenseUtilities.rotateOrientationTable(qtable, sensor2osim)
+        def evaluate(item):
+            """Pipeline stage: risk evaluation and aggregation over the risk windows."""
+            nonlocal severe_risk, moderate_risk
+            frame, q = item
+            frame_collection.append(frame)
+            severe_risk_collection.append(risk_evaluator.eval_sev_risk(frame))
+            moderate_risk_collection.append(risk_evaluator.eval_mod_risk(frame))
 
-        # Inverse kinematics.
-        ik_solver = osim.InverseKinematicsSolver(
-            model,
-            osim.MarkersReference(),
-            osim.OrientationsReference(osim.OpenSenseUtilities.convertQuaternionsToRotations(qtable)),
-            osim.SimTKArrayCoordinateReference()
+            if len(severe_risk_collection) >= config.opensim.risk.severe.duration:
+                severe_risk = \
+                    severe_risk_collection[-config.opensim.risk.severe.duration:].aggregate().logical_and()
+
+            if len(moderate_risk_collection) >= config.opensim.risk.moderate.duration:
+                moderate_risk = \
+                    moderate_risk_collection[-config.opensim.risk.moderate.duration:].aggregate().logical_and()
+
+            if alerts is not None:
+                alerts.publish("severe", severe_risk, frame)
+                alerts.publish("moderate", moderate_risk, frame)
+
+            return frame, q, len(frame_collection)
+
+        def output(item):
+            """Pipeline stage: visualize and report the frame."""
+            frame, q, num_frames = item
+            if visualizer is not None:
+                visualizer.publish(frame.time, q)
+            logger.info("Frames collected: %s", num_frames, extra=HOT_PATH)
+
+        logger.info("Running...")
+        start_time = time.time()
+
+        pipeline_start = time.perf_counter()
+        try:
+            Pipeline(
+                read_sensors(),
+                [solve, evaluate, output],
+                queue_size=config.pipeline.queue_size,
+                threaded=config.pipeline.enabled,
+            ).run()
+        finally:
+            # Even if a stage failed, so that the episodes still open are ended and the sinks closed.
+            try:
+                if visualizer is not None:
+                    visualizer.close()
+            finally:
+                if alerts is not None:
+                    alerts.close()
+        pipeline_seconds = time.perf_counter() - pipeline_start
+        logger.info(
+            "%d frames in %.2f s (%.1f frames/s, %s).", len(frame_collection), pipeline_seconds,
+            len(frame_collection) / pipeline_seconds if pipeline_seconds else 0.0,
+            "pipelined" if config.pipeline.enabled else "serial"
         )
-        state.setTime(curr_timestamp)
-        ik_solver.assemble(state)
-        ik_solver.track(state)
-        if config.opensim.visualize:
-            model.getVisualizer().show(state)
-        frames = {}
-        for frame, coord in config.opensim.coordinates.items():
-            if coord is None:
-                continue
-            value = model.getCoordinateSet().get(coord).getValue(state) * RAD2DEG
-            frames[frame] = value
-        frame = Frame(time=curr_timestamp, **frames)
-        frame_collection.append(frame)
-
-        # Risk
-        severe_risk_collection.append(risk_evaluator.eval_sev_risk(frame))
-        moderate_risk_collection.append(risk_evaluator.eval_mod_risk(frame))
-        logger.info("Frames collected: %s" % len(frame_collection))
-
-        if len(severe_risk_collection) >= config.opensim.risk.severe.duration:
-            severe_risk = \
-                severe_risk_collection[-config.opensim.risk.severe.duration:].aggregate().logical_and()
-
-        if len(moderate_risk_collection) >= config.opensim.risk.moderate.duration:
-            moderate_risk = \
-                moderate_risk_collection[-config.opensim.risk.moderate.duration:].aggregate().logical_and()
-
-        curr_timestamp = round(curr_timestamp + 0.5, 2)
-       
-    for name, collection in quaternion_collection.items():
-        write_data(Path(config.data_path) / name / "quaternions.csv", collection)
-    write_data(Path(config.data_path) / "frames.csv", frame_collection)
-    write_data(Path(config.data_path) / "severe_risk.csv", severe_risk_collection)
-    write_data(Path(config.data_path) / "moderate_risk.csv", moderate_risk_collection)
-
-    logger.info("Terminating process.")
+
+        for name, collection in quaternion_collection.items():
+            write_data(Path(config.data_path) / name / "quaternions.csv", collection)
+        write_data(Path(config.data_path) / "frames.csv", frame_collection)
+        write_data(Path(config.data_path) / "severe_risk.csv", severe_risk_collection)
+        write_data(Path(config.data_path) / "moderate_risk.csv", moderate_risk_collection)
+        if config.archive.enabled:
+            write_archive(
+                config, start_time, quaternion_collection, frame_collection, severe_risk_collection,
+                moderate_risk_collection
+            )
+
+        usage = [process_usage("MAIN")] + [usage_queue.get() for _ in processes]
+        for process in processes.values():
+            process.join()
+        write_run_summary(
+            Path(config.data_path) / "run_summary.json", len(frame_collection), ik_latencies, usage,
+            pipeline_seconds, config.pipeline.enabled
+        )
+        for u in usage:
+            logger.debug("Process usage: %s", u)
+
+        logger.info("Terminating process.")
+    finally:
+        if log_listener is not None:
+            stop_log_listener(log_listener)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,100 @@
+"""Offline processing of whole recordings in a single process."""
+
+from dataclasses import dataclass
+from operator import attrgetter
+from pathlib import Path
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config_store import BaseConfig
+from evaluator import Evaluator, RiskLevel
+from kinematics import InverseKinematics
+from sensor import fuse_recording, sample_frequency
+
+is_enabled = attrgetter("enabled")
+get_details = attrgetter("name", "frame")
+
+
+@dataclass
+class RecordingResult:
+    """Outputs of a recording, one row per frame."""
+
+    time: np.ndarray
+    quaternions: Dict[str, np.ndarray]
+    frames: np.ndarray
+    severe_risk: np.ndarray
+    moderate_risk: np.ndarray
+    names: Tuple[str, ...]
+
+
+class RecordingProcessor:
+    """
+    Fuse, solve and evaluate whole recordings, reusing the same model for every recording.
+    The results are the same as those of main.py, without the real-time sensor processes.
+    """
+
+    def __init__(self, config: BaseConfig) -> None:
+        """
+        :param config: configuration of the pipeline.
+        :type config: BaseConfig
+        """
+        self.config = config
+        self.sensor_details = dict(map(get_details, filter(is_enabled, config.sensor.sensors)))
+        self.ik = InverseKinematics(config.opensim)
+        self.evaluator = Evaluator(config.opensim.risk.severe.rules, config.opensim.risk.moderate.rules, self.ik.names)
+
+    def process(self, recording: Path) -> RecordingResult:
+        """
+        Process a recording.
+        :param recording: directory with one <sensor name>.csv file per enabled sensor.
+        :type recording: Path
+        :return: the outputs of the recording.
+        :rtype: RecordingResult
+        """
+        quaternions = {}
+        for name in self.sensor_details:
+            data = pd.read_csv(Path(recording) / f"{name}.csv").to_numpy()
+            quaternions[name], _ = fuse_recording(data, sample_frequency(data[:, 0]), self.config.sensor.AHRS.settings)
+
+        num_frames = min(len(q) for q in quaternions.values())
+        time = next(iter(quaternions.values()))[:num_frames, 0]
+        self.ik.reset()
+        frames = np.array([
+            self.ik.solve(float(time[i]), {self.sensor_details[name]: q[i, 1:] for name, q in quaternions.items()})
+            for i in range(num_frames)
+        ]).reshape(num_frames, len(self.ik.names))
+
+        return RecordingResult(
+            time=time,
+            quaternions={name: q[:num_frames] for name, q in quaternions.items()},
+            frames=frames,
+            severe_risk=self.evaluator.evaluate(frames, RiskLevel.SEVERE),
+            moderate_risk=self.evaluator.evaluate(frames, RiskLevel.MODERATE),
+            names=self.ik.names,
+        )
+
+    @staticmethod
+    def write(result: RecordingResult, path: Path) -> None:
+        """
+        Write the outputs of a recording in the same layout as main.py.
+        :param result: outputs of the recording.
+        :type result: RecordingResult
+        :param path: directory to write to. Existing outputs are replaced.
+        :type path: Path
+        """
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        for name, q in result.quaternions.items():
+            (path / name).mkdir(parents=True, exist_ok=True)
+            pd.DataFrame(q, columns=["time", "w", "x", "y", "z"]).to_csv(path / name / "quaternions.csv", index=False)
+
+        columns = ["time", *result.names]
+        for file, values in (
+                ("frames.csv", result.frames),
+                ("severe_risk.csv", result.severe_risk),
+                ("moderate_risk.csv", result.moderate_risk),
+        ):
+            data = np.column_stack((result.time, values.astype(float)))
+            pd.DataFrame(data, columns=columns).to_csv(path / file, index=False)
@@ -0,0 +1,113 @@
+"""Staged pipeline connected by bounded queues."""
+
+import queue
+import threading
+from typing import Any, Callable, Iterable, List, Sequence
+
+# Marks the end of the stream between two stages.
+_END = object()
+
+
+class Pipeline:
+    """
+    Run a source and a sequence of stages, each in its own thread, connected by bounded queues.
+    While a stage works on an item, the previous stage prepares the next one and the following stage finishes the
+    previous one, so the throughput approaches that of the slowest stage rather than the sum of all stages.
+    Each stage runs in a single thread, so the state it owns needs no locking.
+    """
+
+    def __init__(
+            self, source: Iterable[Any], stages: Sequence[Callable[[Any], Any]], queue_size: int = 4,
+            threaded: bool = True
+    ) -> None:
+        """
+        :param source: items fed to the first stage.
+        :type source: Iterable[Any]
+        :param stages: functions applied in order, each receiving the output of the previous one.
+        :type stages: Sequence[Callable[[Any], Any]]
+        :param queue_size: maximum number of items waiting between two stages.
+        :type queue_size: int
+        :param threaded: run the stages in threads. If False, each item goes through every stage before the next
+            one is read from the source.
+        :type threaded: bool
+        """
+        self.source = source
+        self.stages = list(stages)
+        self.queue_size = queue_size
+        self.threaded = threaded
+        self.errors: List[BaseException] = []
+        self._stop = threading.Event()
+
+    def run(self) -> None:
+        """
+        Process every item of the source and wait for the last stage to finish. If a stage fails, the pipeline stops
+        and the first error is raised.
+        """
+        if not self.threaded:
+            for item in self.source:
+                for stage in self.stages:
+                    item = stage(item)
+            return
+
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        threads = [threading.Thread(target=self._feed, args=(queues[0],), name="pipeline-source", daemon=True)]
+        for i, stage in enumerate(self.stages):
+            output = queues[i + 1] if i + 1 < len(queues) else None
+            threads.append(threading.Thread(
+                target=self._work, args=(stage, queues[i], output), name=f"pipeline-{stage.__name__}", daemon=True
+            ))
+
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        if self.errors:
+            raise self.errors[0]
+
+    def _put(self, q: queue.Queue, item: Any) -> bool:
+        """Put an item in a queue unless the pipeline is stopped. Return whether the item was put."""
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q: queue.Queue) -> Any:
+        """Get an item from a queue, or _END if the pipeline is stopped."""
+        while not self._stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _END
+
+    def _fail(self, error: BaseException) -> None:
+        """Record an error and stop every stage."""
+        self.errors.append(error)
+        self._stop.set()
+
+    def _feed(self, output: queue.Queue) -> None:
+        try:
+            for item in self.source:
+                if not self._put(output, item):
+                    return
+            self._put(output, _END)
+        except BaseException as error:
+            self._fail(error)
+
+    def _work(self, stage: Callable[[Any], Any], source: queue.Queue, output: queue.Queue) -> None:
+        try:
+            while True:
+                item = self._get(source)
+                if item is _END:
+                    break
+                result = stage(item)
+                if output is not None and not self._put(output, result):
+                    return
+            if output is not None:
+                self._put(output, _END)
+        except BaseException as error:
+            self._fail(error)
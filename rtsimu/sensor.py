@@ -1,20 +1,83 @@
 """Sensor process."""
 
+import multiprocessing as mp
 import time
-from typing import Tuple
+from operator import attrgetter
+from pathlib import Path
+from typing import Dict, List, Tuple
 from multiprocessing import Barrier, Queue
 
 import imufusion
 import pandas as pd
 import numpy as np
 
+from config_store import BaseConfig
+from config_store.logging_schema import LoggingConfig
 from config_store.sensor_schema import AHRSSettings
 from data_collection.imu import IMUCollection, IMUData, IMUSensorLabels, QuaternionData
-from utils import create_colorlog_logger
+from utils import apply_scheduling, create_colorlog_logger, create_queue_logger, process_usage, worker_cores
+
+
+def sample_frequency(timestamps: np.ndarray) -> int:
+    """
+    Estimate the sample frequency of a recording from its timestamps.
+    :param timestamps: timestamps in seconds.
+    :type timestamps: np.ndarray
+    :return: the sample frequency in Hz.
+    :rtype: int
+    """
+    return int(round(1 / np.median(np.diff(timestamps))))
+
+
+def create_ahrs(ahrs_settings: AHRSSettings) -> imufusion.Ahrs:
+    """
+    Create an AHRS algorithm instance.
+    :param ahrs_settings: settings for the sensor fusion.
+    :type ahrs_settings: AHRSSettings
+    :return: the AHRS algorithm instance.
+    :rtype: imufusion.Ahrs
+    """
+    ahrs = imufusion.Ahrs()
+    ahrs.settings = imufusion.Settings(
+        float(ahrs_settings.gain),
+        float(ahrs_settings.acceleration_rejection),
+        float(ahrs_settings.magnetic_rejection),
+        int(ahrs_settings.rejection_timeout),
+    )
+    return ahrs
+
+
+def fuse_recording(data: np.ndarray, frequency: int, ahrs_settings: AHRSSettings) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Run the sensor fusion over a whole recording at once.
+    :param data: recording with the columns time, gyr_x, gyr_y, gyr_z, acc_x, acc_y, acc_z, mag_x, mag_y, mag_z.
+    :type data: np.ndarray
+    :param frequency: frequency of the sensor.
+    :type frequency: int
+    :param ahrs_settings: settings for the sensor fusion.
+    :type ahrs_settings: AHRSSettings
+    :return: the quaternions with the columns time, w, x, y, z and the AHRS errors (in degrees) with the columns
+        acceleration_error, magnetic_error.
+    :rtype: Tuple[np.ndarray, np.ndarray]
+    """
+    ahrs = create_ahrs(ahrs_settings)
+    offset = imufusion.Offset(frequency)
+    quaternions = np.empty((len(data), 5))
+    errors = np.empty((len(data), 2))
+    quaternions[:, 0] = data[:, 0]
+
+    for i, row in enumerate(data):
+        ahrs.update(offset.update(row[1:4]), row[4:7], row[7:10], round(1/frequency, 2))
+        quaternions[i, 1:] = ahrs.quaternion.array.round(5)
+        errors[i] = ahrs.internal_states.acceleration_error, ahrs.internal_states.magnetic_error
+
+    return quaternions, errors
 
 
 def sensor_process(
-        barrier: Barrier, name: str, frequency: int, ahrs_settings: AHRSSettings, queue: Queue
+        barrier: Barrier, name: str, frequency: int, ahrs_settings: AHRSSettings, queue: Queue,
+        log_config: LoggingConfig = None, log_queue: Queue = None, cores: List[int] = None, priority: int = 0,
+        usage_queue: Queue = None, data_sensors: str = "data/data_sensors/"
 ) -> None:
     """
     Read data from the serial port and return the quaternion obtained from teh sensor fusion.
@@ -28,28 +91,39 @@ def sensor_process(
     :type ahrs_settings: AHRSSettings
     :param queue: queue to send the quaternion to.
     :type queue: multiprocessing.Queue
+    :param log_config: logging settings.
+    :type log_config: LoggingConfig
+    :param log_queue: queue of the main process log listener. If None, the process logs to the terminal directly.
+    :type log_queue: multiprocessing.Queue
+    :param cores: cores the process may run on. If empty, the affinity is left unchanged.
+    :type cores: List[int]
+    :param priority: niceness of the process.
+    :type priority: int
+    :param usage_queue: queue to send the CPU usage of the process to when it finishes.
+    :type usage_queue: multiprocessing.Queue
+    :param data_sensors: directory of the recording, with one <name>.csv file per sensor.
+    :type data_sensors: str
     """
 
-    logger = create_colorlog_logger(name=name)
+    log_config = log_config or LoggingConfig()
+    if log_queue is not None:
+        logger = create_queue_logger(log_queue, name=name, sample_interval=log_config.sample_interval)
+    else:
+        logger = create_colorlog_logger(name=name, sample_interval=log_config.sample_interval)
 
+    apply_scheduling(cores or [], priority, logger)
     logger.info("Process started.")
     num_lines_read = 0
     num_sensor_lines = {s: 0 for s in IMUSensorLabels()}
     collection = {sensor: IMUCollection() for sensor in IMUSensorLabels()}
     quaternions = IMUCollection()
-    ahrs = imufusion.Ahrs()
-    ahrs.settings = imufusion.Settings(
-        float(ahrs_settings.gain),
-        float(ahrs_settings.acceleration_rejection),
-        float(ahrs_settings.magnetic_rejection),
-        int(ahrs_settings.rejection_timeout),
-    )
+    ahrs = create_ahrs(ahrs_settings)
     offset = imufusion.Offset(frequency)
     barrier.wait()
 
     logger.info("Data from sensor.")
 
-    df = pd.read_csv("data/data_sensors/"+name+".csv")
+    df = pd.read_csv(Path(data_sensors) / f"{name}.csv")
     
     for row in df.itertuples(index=False, name='Pandas'):
         timestamp = row[0]
@@ -66,3 +140,41 @@ def sensor_process(
 
         quaternions.append(QuaternionData(timestamp, *[round(n, 5) for n in ahrs.quaternion.array.round(5)]))
         queue.put(quaternions.flush(1))
+
+    if usage_queue is not None:
+        usage_queue.put(process_usage(name))
+
+
+def start_sensor_processes(
+        config: BaseConfig, log_queue: Queue = None, usage_queue: Queue = None
+) -> Tuple[Dict[str, mp.Process], Dict[str, Queue]]:
+    """
+    Start a process for each enabled sensor.
+    :param config: configuration of the pipeline.
+    :type config: BaseConfig
+    :param log_queue: queue of the main process log listener. If None, the processes log to the terminal directly.
+    :type log_queue: multiprocessing.Queue
+    :param usage_queue: queue to send the CPU usage of each process to when it finishes.
+    :type usage_queue: multiprocessing.Queue
+    :return: the process and the quaternion queue of each sensor, by sensor name.
+    :rtype: Tuple[Dict[str, mp.Process], Dict[str, Queue]]
+    """
+    sensors = list(filter(attrgetter("enabled"), config.sensor.sensors))
+    barrier = mp.Barrier(len(sensors))
+    processes = {}
+    queues = {}
+    for i, s in enumerate(sensors):
+        q = mp.Queue()
+        process = mp.Process(
+            target=sensor_process,
+            args=(
+                barrier, s.name, 2, config.sensor.AHRS.settings, q, config.log, log_queue,
+                worker_cores(i, config.scheduling.worker_cores, config.scheduling.ik_cores),
+                config.scheduling.worker_priority, usage_queue,
+                config.sensor.data_sensors
+            )
+        )
+        processes[s.name] = process
+        queues[s.name] = q
+        process.start()
+    return processes, queues
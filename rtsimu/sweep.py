@@ -0,0 +1,189 @@
+"""Parallel sweep of the AHRS settings."""
+
+import itertools
+import logging as log
+import multiprocessing as mp
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
+from operator import attrgetter
+from pathlib import Path
+from typing import Dict, List
+
+import hydra
+import numpy as np
+import pandas as pd
+
+from config_store import SweepBaseConfig, register_configs
+from config_store.opensim_schema import OpensimConfig
+from config_store.sensor_schema import AHRSSettings
+from config_store.sweep_schema import SweepConfig
+from kinematics import InverseKinematics
+from sensor import fuse_recording, sample_frequency
+
+# Register hydra config classes
+register_configs()
+
+is_enabled = attrgetter("enabled")
+get_details = attrgetter("name", "frame")
+
+# State of each worker process, loaded once by init_worker.
+_recordings: Dict[str, np.ndarray] = {}
+_frame_names: Dict[str, str] = {}
+_ik: InverseKinematics = None
+
+
+def orientation_stability(quaternions: np.ndarray) -> float:
+    """
+    RMS of the rotation between consecutive orientations.
+    :param quaternions: quaternions with the columns time, w, x, y, z.
+    :type quaternions: np.ndarray
+    :return: the RMS angular step in degrees.
+    :rtype: float
+    """
+    dot = np.abs(np.sum(quaternions[1:, 1:] * quaternions[:-1, 1:], axis=1))
+    steps = np.degrees(2 * np.arccos(np.clip(dot, 0.0, 1.0)))
+    return float(np.sqrt(np.mean(steps ** 2)))
+
+
+def angle_stability(angles: np.ndarray) -> float:
+    """
+    RMS of the second difference of the angles, averaged over the coordinates.
+    :param angles: angles in degrees, one column per coordinate.
+    :type angles: np.ndarray
+    :return: the mean RMS angular acceleration per sample, in degrees.
+    :rtype: float
+    """
+    return float(np.mean(np.sqrt(np.mean(np.diff(angles, n=2, axis=0) ** 2, axis=0))))
+
+
+def grid_settings(sweep: SweepConfig) -> List[Dict[str, float]]:
+    """
+    Build the list of AHRS settings to evaluate.
+    :param sweep: sweep configuration.
+    :type sweep: SweepConfig
+    :return: the AHRS settings, as keyword arguments of AHRSSettings.
+    :rtype: List[Dict[str, float]]
+    """
+    names = list(asdict(AHRSSettings()).keys())
+    values = [list(sweep.grid[name]) for name in names]
+
+    if sweep.strategy == "grid":
+        return [dict(zip(names, combination)) for combination in itertools.product(*values)]
+    if sweep.strategy == "random":
+        rng = random.Random(sweep.seed)
+        return [
+            {
+                name: rng.randint(int(min(v)), int(max(v))) if name == "rejection_timeout" else
+                rng.uniform(min(v), max(v))
+                for name, v in zip(names, values)
+            }
+            for _ in range(sweep.num_samples)
+        ]
+    raise ValueError(f"Unknown sweep strategy: {sweep.strategy}")
+
+
+def init_worker(data_sensors: str, sensor_details: Dict[str, str], opensim_config: OpensimConfig = None) -> None:
+    """
+    Load the recordings, and the model if angles are computed, once per worker process.
+    :param data_sensors: directory with one <sensor name>.csv file per sensor.
+    :type data_sensors: str
+    :param sensor_details: frame of each enabled sensor, keyed by the sensor name.
+    :type sensor_details: Dict[str, str]
+    :param opensim_config: OpenSim configuration. If None, the angles are not computed.
+    :type opensim_config: OpensimConfig
+    """
+    global _ik
+    for name, frame in sensor_details.items():
+        _recordings[name] = pd.read_csv(Path(data_sensors) / f"{name}.csv").to_numpy()
+        _frame_names[name] = frame
+    if opensim_config is not None:
+        _ik = InverseKinematics(opensim_config)
+
+
+def evaluate(settings: Dict[str, float]) -> Dict[str, float]:
+    """
+    Fuse every recording with the given settings and measure the result.
+    :param settings: AHRS settings, as keyword arguments of AHRSSettings.
+    :type settings: Dict[str, float]
+    :return: the settings and their metrics.
+    :rtype: Dict[str, float]
+    """
+    ahrs_settings = AHRSSettings(**settings)
+    quaternions = {}
+    drift, stability = [], []
+
+    for name, data in _recordings.items():
+        quaternions[name], errors = fuse_recording(data, sample_frequency(data[:, 0]), ahrs_settings)
+        drift.append(np.mean(errors))
+        stability.append(orientation_stability(quaternions[name]))
+
+    result = dict(settings, drift=float(np.mean(drift)), orientation_stability=float(np.mean(stability)))
+
+    if _ik is not None:
+        time = next(iter(quaternions.values()))[:, 0]
+        num_frames = min(len(q) for q in quaternions.values())
+        # Start from the default pose, not from the last pose of the previous setting of this worker.
+        _ik.reset()
+        angles = np.array([
+            _ik.solve(float(time[i]), {_frame_names[name]: q[i, 1:] for name, q in quaternions.items()})
+            for i in range(num_frames)
+        ])
+        result["angle_stability"] = angle_stability(angles)
+
+    return result
+
+
+def rank(results: List[Dict[str, float]], sweep: SweepConfig) -> pd.DataFrame:
+    """
+    Score and sort the results, best first.
+    :param results: settings and metrics of each evaluation.
+    :type results: List[Dict[str, float]]
+    :param sweep: sweep configuration.
+    :type sweep: SweepConfig
+    :return: the ranked results.
+    :rtype: pd.DataFrame
+    """
+    df = pd.DataFrame(results)
+    stability = df["angle_stability"] if "angle_stability" in df else df["orientation_stability"]
+    df["score"] = sweep.drift_weight * df["drift"] + sweep.stability_weight * stability
+    return df.sort_values("score", ignore_index=True)
+
+
+@hydra.main(config_path=Path("rtsimu/config").absolute().as_posix(), config_name="sweep", version_base=None)
+def main(config: SweepBaseConfig):
+    """Sweep function."""
+    logger = log.getLogger("MAIN")
+
+    settings = grid_settings(config.sweep)
+    sensor_details = dict(map(get_details, filter(is_enabled, config.sensor.sensors)))
+    workers = config.sweep.workers or os.cpu_count()
+    logger.info("Evaluating %d AHRS settings on %d workers.", len(settings), workers)
+
+    with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=mp.get_context("spawn"),
+            initializer=init_worker,
+            initargs=(
+                config.sensor.data_sensors,
+                sensor_details,
+                config.opensim if config.sweep.compute_angles else None
+            ),
+    ) as executor:
+        results = []
+        for result in executor.map(evaluate, settings):
+            results.append(result)
+            logger.debug("Evaluated %d/%d settings.", len(results), len(settings))
+
+    ranking = rank(results, config.sweep)
+    path = Path(config.data_path) / "sweep.csv"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    ranking.to_csv(path, index=False)
+
+    logger.info("Best settings:\n%s", ranking.head(5).to_string())
+    logger.info("Ranking saved to %s.", path)
+
+
+if __name__ == "__main__":
+    main()
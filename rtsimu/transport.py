@@ -0,0 +1,130 @@
+"""Binary messages between the edge nodes and the central node."""
+
+import json
+import socket
+import struct
+from typing import Dict, Tuple
+
+import numpy as np
+
+# Every message is a header (type, payload length) followed by the payload.
+HEADER = struct.Struct("!BI")
+HELLO = 1
+BATCH = 2
+END = 3
+
+# A batch payload is a header (sequence number, number of rows) followed by the rows.
+BATCH_HEADER = struct.Struct("!IH")
+MAX_BATCH_ROWS = 2 ** 16 - 1
+
+
+def batch_dtype(num_sensors: int) -> np.dtype:
+    """
+    Layout of a row of a batch: the time (float64) and the quaternion w, x, y, z (float32) of each sensor.
+    :param num_sensors: number of sensors of the wearer.
+    :type num_sensors: int
+    :return: the row layout, in network byte order.
+    :rtype: np.dtype
+    """
+    return np.dtype([("time", ">f8"), ("quaternions", ">f4", (num_sensors, 4))])
+
+
+def encode_message(kind: int, payload: bytes = b"") -> bytes:
+    """
+    Frame a payload.
+    :param kind: message type: HELLO, BATCH or END.
+    :type kind: int
+    :param payload: content of the message.
+    :type payload: bytes
+    :return: the message.
+    :rtype: bytes
+    """
+    return HEADER.pack(kind, len(payload)) + payload
+
+
+def encode_hello(wearer: str, session: float, sensors: Dict[str, str]) -> bytes:
+    """
+    Identify the stream at the start of a connection. The sequence numbers restart from zero with each session.
+    :param wearer: name of the wearer.
+    :type wearer: str
+    :param session: identifier of the session, e.g. its start time, the same for every connection of the session.
+    :type session: float
+    :param sensors: model frame of each sensor, in the order of the quaternions of the batches.
+    :type sensors: Dict[str, str]
+    :return: the message.
+    :rtype: bytes
+    """
+    hello = {"wearer": wearer, "session": session, "sensors": list(sensors.items())}
+    return encode_message(HELLO, json.dumps(hello).encode("utf-8"))
+
+
+def decode_hello(payload: bytes) -> Tuple[str, float, Dict[str, str]]:
+    """
+    Inverse of encode_hello.
+    :param payload: content of the message.
+    :type payload: bytes
+    :return: the name of the wearer, the session and the model frame of each sensor.
+    :rtype: Tuple[str, float, Dict[str, str]]
+    """
+    hello = json.loads(payload.decode("utf-8"))
+    return hello["wearer"], hello["session"], dict(hello["sensors"])
+
+
+def encode_batch(sequence: int, time: np.ndarray, quaternions: np.ndarray) -> bytes:
+    """
+    Pack consecutive frames of quaternions.
+    :param sequence: sequence number of the batch.
+    :type sequence: int
+    :param time: time of each row.
+    :type time: np.ndarray
+    :param quaternions: quaternions w, x, y, z with the shape (rows, sensors, 4).
+    :type quaternions: np.ndarray
+    :return: the message.
+    :rtype: bytes
+    """
+    rows = np.empty(len(time), dtype=batch_dtype(quaternions.shape[1]))
+    rows["time"] = time
+    rows["quaternions"] = quaternions
+    return encode_message(BATCH, BATCH_HEADER.pack(sequence, len(rows)) + rows.tobytes())
+
+
+def decode_batch(payload: bytes, num_sensors: int) -> Tuple[int, np.ndarray, np.ndarray]:
+    """
+    Inverse of encode_batch.
+    :param payload: content of the message.
+    :type payload: bytes
+    :param num_sensors: number of sensors announced by the hello.
+    :type num_sensors: int
+    :return: the sequence number, the time of each row and the quaternions with the shape (rows, sensors, 4).
+    :rtype: Tuple[int, np.ndarray, np.ndarray]
+    """
+    sequence, num_rows = BATCH_HEADER.unpack_from(payload)
+    rows = np.frombuffer(payload, dtype=batch_dtype(num_sensors), count=num_rows, offset=BATCH_HEADER.size)
+    return sequence, rows["time"].astype(float), rows["quaternions"].astype(float)
+
+
+def read_exact(sock: socket.socket, size: int) -> bytes:
+    """
+    Read exactly size bytes from a socket.
+    :raises ConnectionError: if the connection is closed before.
+    """
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("Connection closed by the peer.")
+        data += chunk
+    return bytes(data)
+
+
+def read_message(sock: socket.socket) -> Tuple[int, bytes]:
+    """
+    Read the next message from a socket.
+    :param sock: connected socket.
+    :type sock: socket.socket
+    :return: the message type and its payload.
+    :rtype: Tuple[int, bytes]
+    :raises ConnectionError: if the connection is closed.
+    """
+    kind, size = HEADER.unpack(read_exact(sock, HEADER.size))
+    return kind, read_exact(sock, size)
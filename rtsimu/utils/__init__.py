@@ -1,2 +1,6 @@
-from .eval import safe_eval
-from .logger import create_colorlog_logger
\ No newline at end of file
+from .eval import compile_expression, safe_eval
+from .logger import (
+    HOT_PATH, SamplingFilter, create_colorlog_logger, create_queue_logger, start_log_listener, stop_log_listener
+)
+from .rate import RateLimiter
+from .scheduling import apply_scheduling, process_usage, worker_cores
@@ -2,7 +2,10 @@ import ast
 import operator
 import math
 import sys
-from typing import Any, Generator, Iterable, Tuple
+from functools import reduce
+from typing import Any, Callable, Generator, Iterable, Tuple
+
+import numpy as np
 
 if sys.version_info >= (3, 10):
     from itertools import pairwise
@@ -30,6 +33,19 @@ def safe_eval(s: str) -> Any:
     :return: the result of the evaluation.
     :rtype: Any
     """
+    return compile_expression(s)()
+
+
+def compile_expression(s: str) -> Callable[..., Any]:
+    """
+    Parse a string containing a Python expression once, to be evaluated many times.
+    Variables of the expression are given as keyword arguments when evaluating it. They can be NumPy arrays, in
+    which case comparisons and boolean operators are applied element-wise.
+    :param s: the string to parse.
+    :type s: str
+    :return: a function evaluating the expression.
+    :rtype: Callable[..., Any]
+    """
 
     def checkmath(x, *args):
         """
@@ -61,8 +77,8 @@ def safe_eval(s: str) -> Any:
     }
 
     bool_ops = {
-        ast.And: all,
-        ast.Or: any,
+        ast.And: lambda values: reduce(np.logical_and, values),
+        ast.Or: lambda values: reduce(np.logical_or, values),
     }
 
     cmp_ops = {
@@ -84,9 +100,9 @@ def safe_eval(s: str) -> Any:
 
     tree = ast.parse(s, mode='eval')
 
-    def _eval(node):
+    def _eval(node, variables):
         if isinstance(node, ast.Expression):
-            return _eval(node.body)
+            return _eval(node.body, variables)
         elif isinstance(node, ast.Str):
             return node.s
         elif isinstance(node, ast.Num):
@@ -95,36 +111,39 @@ def safe_eval(s: str) -> Any:
             return node.value
         elif isinstance(node, ast.Name):
             if isinstance(node.ctx, ast.Load):
-                return names[node.id]
+                return variables[node.id] if node.id in variables else names[node.id]
             else:
                 raise SyntaxError(f"Bad syntax, {type(node)}")
         elif isinstance(node, ast.BinOp):
             if isinstance(node.left, (ops, ast.Name)):
-                left = _eval(node.left)
+                left = _eval(node.left, variables)
             else:
                 left = node.left.value
             if isinstance(node.right, (ops, ast.Name)):
-                right = _eval(node.right)
+                right = _eval(node.right, variables)
             else:
                 right = node.right.value
             return bin_ops[type(node.op)](left, right)
         elif isinstance(node, ast.UnaryOp):
             if isinstance(node.operand, (ops, ast.Name)):
-                operand = _eval(node.operand)
+                operand = _eval(node.operand, variables)
             else:
                 operand = node.operand.value
             return un_ops[type(node.op)](operand)
         elif isinstance(node, ast.BoolOp):
-            values = [_eval(v) for v in node.values]
+            values = [_eval(v, variables) for v in node.values]
             return bool_ops[type(node.op)](values)
         elif isinstance(node, ast.Call):
-            args = [_eval(x) for x in node.args]
+            args = [_eval(x, variables) for x in node.args]
             r = checkmath(node.func.id, *args)
             return r
         elif isinstance(node, ast.Compare):
-            comparators = [_eval(node.left)] + [_eval(c) for c in node.comparators]
-            return all(cmp_ops[type(op)](left, right) for op, (left, right) in zip(node.ops, pairwise(comparators)))
+            comparators = [_eval(node.left, variables)] + [_eval(c, variables) for c in node.comparators]
+            return reduce(
+                np.logical_and,
+                [cmp_ops[type(op)](left, right) for op, (left, right) in zip(node.ops, pairwise(comparators))]
+            )
         else:
             raise SyntaxError(f"Bad syntax, {type(node)}")
 
-    return _eval(tree)
\ No newline at end of file
+    return lambda **variables: _eval(tree, variables)
\ No newline at end of file
@@ -1,6 +1,12 @@
+from collections import Counter
 from colorlog import ColoredFormatter
+from logging.handlers import QueueHandler, QueueListener
+from multiprocessing import Queue
+from typing import Dict, Tuple
 import logging
 
+from .rate import RateLimiter
+
 TIMESTAMP_FORMAT = '%(cyan)s%(asctime)s%(reset)s'
 NAME_FORMAT = '%(blue)s%(name)s%(reset)s'
 LEVEL_FORMAT = '%(log_color)s%(levelname)s%(reset)s'
@@ -16,7 +22,9 @@ LOG_COLORS = {
 }
 
 
-def create_colorlog_logger(fmt: str = LOG_FORMAT, name: str = "COLORLOG", level: int = logging.DEBUG) -> logging.Logger:
+def create_colorlog_logger(
+        fmt: str = LOG_FORMAT, name: str = "COLORLOG", level: int = logging.DEBUG, sample_interval: float = 0.0
+) -> logging.Logger:
     """
     Create a logger with a custom formatter.
     :param fmt: format of the logger. Default is LOG_FORMAT.
@@ -25,6 +33,9 @@ def create_colorlog_logger(fmt: str = LOG_FORMAT, name: str = "COLORLOG", level:
     :type name: str
     :param level: level of the logger. Default is logging.DEBUG.
     :type level: int
+    :param sample_interval: minimum number of seconds between hot-path records with the same message. Default is 0,
+        which emits every record.
+    :type sample_interval: float
     :return: the created logger.
     :rtype: logging.Logger
     """
@@ -34,4 +45,95 @@ def create_colorlog_logger(fmt: str = LOG_FORMAT, name: str = "COLORLOG", level:
     logger = logging.getLogger(name)
     logger.setLevel(level)
     logger.addHandler(stream)
-    return logger
\ No newline at end of file
+    logger.addFilter(SamplingFilter(sample_interval))
+    return logger
+
+# Pass as ``extra`` to mark a record as hot-path, e.g. logger.info("Frame %d", n, extra=HOT_PATH).
+HOT_PATH = {"sampled": True}
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Let through at most one hot-path record per logger and message per interval. Other records always pass.
+    """
+
+    def __init__(self, interval: float = 1.0) -> None:
+        """
+        :param interval: minimum number of seconds between two hot-path records with the same message.
+        :type interval: float
+        """
+        super().__init__()
+        self.rate = 1.0 / interval if interval > 0 else 0.0
+        self.limiters: Dict[Tuple[str, str], RateLimiter] = {}
+        self.suppressed: Counter = Counter()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not getattr(record, "sampled", False):
+            return True
+        key = (record.name, record.msg)
+        limiter = self.limiters.setdefault(key, RateLimiter(self.rate))
+        if not limiter.ready():
+            self.suppressed[key] += 1
+            return False
+        suppressed = self.suppressed.pop(key, 0)
+        if suppressed:
+            record.msg = f"{record.msg} ({suppressed} similar messages sampled out)"
+        return True
+
+
+def create_queue_logger(
+        queue: Queue, name: str = "COLORLOG", level: int = logging.DEBUG, sample_interval: float = 1.0
+) -> logging.Logger:
+    """
+    Create a logger that sends its records to a queue, to be emitted by a listener in another process.
+    :param queue: queue shared with the listener.
+    :type queue: multiprocessing.Queue
+    :param name: name of the logger.
+    :type name: str
+    :param level: level of the logger. Default is logging.DEBUG.
+    :type level: int
+    :param sample_interval: minimum number of seconds between hot-path records with the same message.
+    :type sample_interval: float
+    :return: the created logger.
+    :rtype: logging.Logger
+    """
+    logger = logging.getLogger(name)
+    logger.setLevel(level)
+    logger.addHandler(QueueHandler(queue))
+    logger.addFilter(SamplingFilter(sample_interval))
+    logger.propagate = False
+    return logger
+
+
+def start_log_listener(queue: Queue) -> QueueListener:
+    """
+    Move the handlers of the root logger to a listener thread fed by a queue. Records from this process and from
+    the processes using :func:`create_queue_logger` with the same queue are then emitted by that single thread.
+    :param queue: queue shared with the producers.
+    :type queue: multiprocessing.Queue
+    :return: the started listener.
+    :rtype: logging.handlers.QueueListener
+    """
+    root = logging.getLogger()
+    handlers = list(root.handlers)
+    for handler in handlers:
+        root.removeHandler(handler)
+    root.addHandler(QueueHandler(queue))
+    listener = QueueListener(queue, *handlers, respect_handler_level=True)
+    listener.start()
+    return listener
+
+
+def stop_log_listener(listener: QueueListener) -> None:
+    """
+    Flush and stop a listener created by :func:`start_log_listener` and give its handlers back to the root logger.
+    :param listener: the listener to stop.
+    :type listener: logging.handlers.QueueListener
+    """
+    listener.stop()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        if isinstance(handler, QueueHandler):
+            root.removeHandler(handler)
+    for handler in listener.handlers:
+        root.addHandler(handler)
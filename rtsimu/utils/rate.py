@@ -0,0 +1,31 @@
+import time
+from typing import Callable
+
+
+class RateLimiter:
+    """
+    Allow an action at most a given number of times per second.
+    """
+
+    def __init__(self, rate: float, clock: Callable[[], float] = time.monotonic) -> None:
+        """
+        :param rate: maximum number of actions per second. A value of zero or less disables the limit.
+        :type rate: float
+        :param clock: monotonic clock returning seconds.
+        :type clock: Callable[[], float]
+        """
+        self.period = 1.0 / rate if rate > 0 else 0.0
+        self.clock = clock
+        self.last = None
+
+    def ready(self) -> bool:
+        """
+        Check whether the action may run now and, if so, register it.
+        :return: True if the period has elapsed since the last allowed action.
+        :rtype: bool
+        """
+        now = self.clock()
+        if self.last is not None and now - self.last < self.period:
+            return False
+        self.last = now
+        return True
@@ -0,0 +1,83 @@
+import logging
+import os
+import sys
+from typing import Any, Dict, List, Sequence
+
+try:
+    import resource
+except ImportError:  # Not available on Windows.
+    resource = None
+
+
+def apply_scheduling(cores: Sequence[int], priority: int, logger: logging.Logger) -> None:
+    """
+    Pin the calling process to a set of cores and set its priority. Child processes inherit both, so apply this to
+    a parent process only after starting the children that must not share its scheduling. Settings that the platform
+    or the permissions of the user do not allow are skipped with a warning.
+    :param cores: cores the process may run on. If empty, the affinity is left unchanged.
+    :type cores: Sequence[int]
+    :param priority: niceness of the process, set as is rather than added to the inherited one. Lower values than
+        the current niceness usually require privileges.
+    :type priority: int
+    :param logger: logger to report failures to.
+    :type logger: logging.Logger
+    """
+    if cores:
+        if hasattr(os, "sched_setaffinity"):
+            try:
+                os.sched_setaffinity(0, cores)
+            except OSError as error:
+                logger.warning("Could not pin process to cores %s: %s", list(cores), error)
+        else:
+            logger.warning("CPU affinity is not supported on this platform.")
+    try:
+        if os.getpriority(os.PRIO_PROCESS, 0) != priority:
+            os.setpriority(os.PRIO_PROCESS, 0, priority)
+    except (AttributeError, OSError) as error:
+        logger.warning("Could not set process niceness to %d: %s", priority, error)
+
+
+def worker_cores(index: int, cores: Sequence[int], reserved: Sequence[int] = ()) -> List[int]:
+    """
+    Core of the index-th worker when packing workers onto a set of cores in turn.
+    :param index: index of the worker.
+    :type index: int
+    :param cores: cores shared by the workers. If empty, the worker may run on every core available to the calling
+        process except the reserved ones.
+    :type cores: Sequence[int]
+    :param reserved: cores kept for another process, e.g. the inverse kinematics.
+    :type reserved: Sequence[int]
+    :return: the cores the worker may run on. If empty, the worker is not pinned.
+    :rtype: List[int]
+    """
+    if cores:
+        return [cores[index % len(cores)]]
+    if not reserved or not hasattr(os, "sched_getaffinity"):
+        return []
+    return sorted(os.sched_getaffinity(0) - set(reserved))
+
+
+def process_usage(name: str) -> Dict[str, Any]:
+    """
+    CPU time, context switches, peak memory and scheduling of the calling process, including all its threads.
+    :param name: name to report the process under.
+    :type name: str
+    :return: the usage of the process.
+    :rtype: Dict[str, Any]
+    """
+    usage: Dict[str, Any] = {"name": name, "pid": os.getpid()}
+    if hasattr(os, "sched_getaffinity"):
+        usage["cores"] = sorted(os.sched_getaffinity(0))
+    if hasattr(os, "getpriority"):
+        usage["niceness"] = os.getpriority(os.PRIO_PROCESS, 0)
+    if resource is not None:
+        rusage = resource.getrusage(resource.RUSAGE_SELF)
+        usage.update(
+            user_time=rusage.ru_utime,
+            system_time=rusage.ru_stime,
+            voluntary_context_switches=rusage.ru_nvcsw,
+            involuntary_context_switches=rusage.ru_nivcsw,
+            # ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+            peak_memory_mb=rusage.ru_maxrss / (2 ** 20 if sys.platform == "darwin" else 2 ** 10),
+        )
+    return usage
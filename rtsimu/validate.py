@@ -0,0 +1,303 @@
+"""Accuracy and speed of a candidate configuration against the reference configuration."""
+
+import json
+import logging as log
+import multiprocessing as mp
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import hydra
+import numpy as np
+import pandas as pd
+from omegaconf import OmegaConf
+
+from analytics import extract_episodes
+from batch import expand_recordings
+from config_store import BaseConfig, ValidateBaseConfig, register_configs
+from offline import RecordingProcessor, RecordingResult
+from utils import process_usage
+
+# Register hydra config classes
+register_configs()
+
+RISK_LEVELS = ("severe", "moderate")
+
+
+def run_config(config: BaseConfig, recordings: List[Path], name: str) -> Dict[str, Any]:
+    """
+    Process the recordings with a configuration, timing the loading of the model and the processing.
+    :param config: configuration of the pipeline.
+    :type config: BaseConfig
+    :param recordings: recording directories.
+    :type recordings: List[Path]
+    :param name: name to report the process under.
+    :type name: str
+    :return: the results of each recording, the load and processing times in seconds and the process usage.
+    :rtype: Dict[str, Any]
+    """
+    start = time.perf_counter()
+    processor = RecordingProcessor(config)
+    load_seconds = time.perf_counter() - start
+
+    results, seconds = [], []
+    for recording in recordings:
+        start = time.perf_counter()
+        results.append(processor.process(recording))
+        seconds.append(time.perf_counter() - start)
+    return {"results": results, "load_seconds": load_seconds, "seconds": seconds, "usage": process_usage(name)}
+
+
+def run_isolated(config: BaseConfig, recordings: List[Path], name: str) -> Dict[str, Any]:
+    """
+    Same as run_config, in a fresh process so that the peak memory and the timings of each configuration are
+    measured separately.
+    """
+    with ProcessPoolExecutor(max_workers=1, mp_context=mp.get_context("spawn")) as executor:
+        return executor.submit(run_config, config, recordings, name).result()
+
+
+def align(reference: RecordingResult, candidate: RecordingResult) -> Tuple[List[str], np.ndarray, Dict[str, Any]]:
+    """
+    Resample the candidate onto the frames of the reference, so that both can be compared frame by frame even if
+    the candidate runs at a lower rate. Angles are interpolated and risks are held from the last candidate frame.
+    :param reference: results of the reference.
+    :type reference: RecordingResult
+    :param candidate: results of the candidate.
+    :type candidate: RecordingResult
+    :return: the coordinates present in both, the candidate angles and the candidate risk of each level, with one row
+        per reference frame and one column per coordinate.
+    :rtype: Tuple[List[str], np.ndarray, Dict[str, Any]]
+    """
+    names = [name for name in reference.names if name in candidate.names]
+    columns = [candidate.names.index(name) for name in names]
+    angles = np.column_stack([
+        np.interp(reference.time, candidate.time, candidate.frames[:, j]) for j in columns
+    ]) if columns else np.empty((len(reference.time), 0))
+    rows = np.clip(np.searchsorted(candidate.time, reference.time, side="right") - 1, 0, len(candidate.time) - 1)
+    risks = {level: getattr(candidate, f"{level}_risk")[rows][:, columns] for level in RISK_LEVELS}
+    return names, angles, risks
+
+
+def angle_error(reference: np.ndarray, candidate: np.ndarray, names: List[str]) -> pd.DataFrame:
+    """
+    Error of the candidate angles.
+    :param reference: reference angles in degrees, one column per coordinate.
+    :type reference: np.ndarray
+    :param candidate: candidate angles, same shape as reference.
+    :type candidate: np.ndarray
+    :param names: name of each coordinate.
+    :type names: List[str]
+    :return: one row per coordinate with the RMS, maximum and mean (bias) error in degrees.
+    :rtype: pd.DataFrame
+    """
+    error = candidate - reference
+    return pd.DataFrame({
+        "coordinate": names,
+        "rms": np.sqrt(np.mean(error ** 2, axis=0)),
+        "max": np.max(np.abs(error), axis=0),
+        "bias": np.mean(error, axis=0),
+    })
+
+
+def risk_agreement(reference: np.ndarray, candidate: np.ndarray, names: List[str]) -> pd.DataFrame:
+    """
+    Agreement of the candidate risk labels.
+    :param reference: reference risk, boolean matrix with one row per frame and one column per joint.
+    :type reference: np.ndarray
+    :param candidate: candidate risk, same shape as reference.
+    :type candidate: np.ndarray
+    :param names: name of each joint.
+    :type names: List[str]
+    :return: one row per joint with the fraction of frames with the same label, the frames at risk in each and the
+        frames missed (at risk in the reference only) and added (at risk in the candidate only) by the candidate.
+    :rtype: pd.DataFrame
+    """
+    reference = reference.astype(bool)
+    candidate = candidate.astype(bool)
+    return pd.DataFrame({
+        "joint": names,
+        "agreement": np.mean(reference == candidate, axis=0),
+        "reference_frames": reference.sum(axis=0),
+        "candidate_frames": candidate.sum(axis=0),
+        "missed_frames": (reference & ~candidate).sum(axis=0),
+        "added_frames": (~reference & candidate).sum(axis=0),
+    })
+
+
+def episode_timing(reference: pd.DataFrame, candidate: pd.DataFrame, names: List[str]) -> pd.DataFrame:
+    """
+    Timing differences of the risk episodes. Each reference episode is matched with the candidate episode of the
+    same joint that overlaps it the most.
+    :param reference: reference episodes, as returned by extract_episodes.
+    :type reference: pd.DataFrame
+    :param candidate: candidate episodes, as returned by extract_episodes.
+    :type candidate: pd.DataFrame
+    :param names: name of each joint.
+    :type names: List[str]
+    :return: one row per joint with the number of episodes in each, the number of matched episodes and the mean and
+        maximum absolute shift of their start and end, in seconds.
+    :rtype: pd.DataFrame
+    """
+    rows = []
+    for name in names:
+        ref = reference[reference["joint"] == name]
+        cand = candidate[candidate["joint"] == name]
+        overlap = np.maximum(
+            0.0,
+            np.minimum(ref["end"].to_numpy()[:, None], cand["end"].to_numpy()[None, :])
+            - np.maximum(ref["start"].to_numpy()[:, None], cand["start"].to_numpy()[None, :])
+        )
+        if overlap.size:
+            best = np.argmax(overlap, axis=1)
+            matched = overlap[np.arange(len(ref)), best] > 0
+        else:
+            best = np.zeros(len(ref), dtype=np.intp)
+            matched = np.zeros(len(ref), dtype=bool)
+        start_shift = np.abs(cand["start"].to_numpy()[best[matched]] - ref["start"].to_numpy()[matched])
+        end_shift = np.abs(cand["end"].to_numpy()[best[matched]] - ref["end"].to_numpy()[matched])
+        rows.append({
+            "joint": name,
+            "reference_episodes": len(ref),
+            "candidate_episodes": len(cand),
+            "matched_episodes": int(matched.sum()),
+            "mean_start_shift": start_shift.mean() if len(start_shift) else np.nan,
+            "mean_end_shift": end_shift.mean() if len(end_shift) else np.nan,
+            "max_shift": max(start_shift.max(), end_shift.max()) if len(start_shift) else np.nan,
+        })
+    return pd.DataFrame(rows)
+
+
+def compare(reference: RecordingResult, candidate: RecordingResult) -> Dict[str, pd.DataFrame]:
+    """
+    Compare the results of the candidate with those of the reference on the same recording.
+    :param reference: results of the reference.
+    :type reference: RecordingResult
+    :param candidate: results of the candidate.
+    :type candidate: RecordingResult
+    :return: the angle error, risk agreement and episode timing tables.
+    :rtype: Dict[str, pd.DataFrame]
+    """
+    names, angles, risks = align(reference, candidate)
+    columns = [reference.names.index(name) for name in names]
+    ref_angles = reference.frames[:, columns]
+
+    agreement, timing = [], []
+    for level in RISK_LEVELS:
+        ref_risk = getattr(reference, f"{level}_risk")[:, columns]
+        agreement.append(risk_agreement(ref_risk, risks[level], names))
+        timing.append(episode_timing(
+            extract_episodes(reference.time, ref_risk, ref_angles, names),
+            extract_episodes(reference.time, risks[level], angles, names),
+            names,
+        ))
+        for table in (agreement[-1], timing[-1]):
+            table.insert(0, "level", level)
+
+    return {
+        "angle_error": angle_error(ref_angles, angles, names),
+        "risk_agreement": pd.concat(agreement, ignore_index=True),
+        "episode_timing": pd.concat(timing, ignore_index=True),
+    }
+
+
+def performance(run: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Summarize the speed and memory of a run returned by run_config.
+    """
+    seconds = float(sum(run["seconds"]))
+    frames = int(sum(len(result.time) for result in run["results"]))
+    return {
+        "load_seconds": run["load_seconds"],
+        "seconds": seconds,
+        "frames": frames,
+        "frames_per_second": frames / seconds if seconds else 0.0,
+        "peak_memory_mb": run["usage"].get("peak_memory_mb"),
+    }
+
+
+@hydra.main(config_path=Path("rtsimu/config").absolute().as_posix(), config_name="validate", version_base=None)
+def main(config: ValidateBaseConfig):
+    """Validation function."""
+    logger = log.getLogger("MAIN")
+    settings = config.validate
+
+    recordings, missing = expand_recordings(list(settings.recordings))
+    for match in missing:
+        logger.warning("%s is not a recording directory, skipped.", match)
+    candidate_config = OmegaConf.merge(config, OmegaConf.from_dotlist(list(settings.candidate)))
+    logger.info(
+        "Validating %s on %d recordings.", ", ".join(settings.candidate) or "the reference", len(recordings)
+    )
+
+    reference_run = run_isolated(config, recordings, "reference")
+    candidate_run = run_isolated(candidate_config, recordings, "candidate")
+
+    tables: Dict[str, List[pd.DataFrame]] = {"angle_error": [], "risk_agreement": [], "episode_timing": []}
+    for recording, reference, candidate in zip(recordings, reference_run["results"], candidate_run["results"]):
+        for name, table in compare(reference, candidate).items():
+            table.insert(0, "recording", str(recording))
+            tables[name].append(table)
+
+    output_path = Path(settings.output_path)
+    output_path.mkdir(parents=True, exist_ok=True)
+    reports = {name: pd.concat(parts, ignore_index=True) for name, parts in tables.items() if parts}
+    for name, report in reports.items():
+        report.to_csv(output_path / f"{name}.csv", index=False)
+
+    # Acceptance criteria.
+    failures = []
+    if "angle_error" in reports:
+        angles = reports["angle_error"]
+        for _, row in angles[angles["rms"] > settings.max_angle_rms].iterrows():
+            failures.append(f"{row['recording']}: {row['coordinate']} RMS error of {row['rms']:.2f} deg")
+        agreement = reports["risk_agreement"]
+        for _, row in agreement[agreement["agreement"] < settings.min_agreement].iterrows():
+            failures.append(f"{row['recording']}: {row['level']} {row['joint']} agreement of {row['agreement']:.3f}")
+        timing = reports["episode_timing"]
+        # The shifts are NaN when no episode is matched, which must fail rather than compare as False.
+        shift = timing[["mean_start_shift", "mean_end_shift"]].max(axis=1, skipna=False)
+        unmatched = timing["matched_episodes"] < timing["reference_episodes"]
+        for _, row in timing[unmatched].iterrows():
+            failures.append(
+                f"{row['recording']}: {row['level']} {row['joint']} {row['matched_episodes']} of "
+                f"{row['reference_episodes']} episodes matched"
+            )
+        shifted = ~unmatched & (
+            (shift.isna() & (timing["reference_episodes"] > 0)) | (shift > settings.max_episode_shift)
+        )
+        for _, row in timing[shifted].iterrows():
+            failures.append(
+                f"{row['recording']}: {row['level']} {row['joint']} episodes shifted by "
+                f"{max(row['mean_start_shift'], row['mean_end_shift']):.2f} s"
+            )
+
+    reference_perf = performance(reference_run)
+    candidate_perf = performance(candidate_run)
+    summary = {
+        "candidate": list(settings.candidate),
+        "recordings": [str(recording) for recording in recordings],
+        "reference": reference_perf,
+        "candidate_performance": candidate_perf,
+        "speedup": reference_perf["seconds"] / candidate_perf["seconds"] if candidate_perf["seconds"] else None,
+        "passed": not failures,
+        "failures": failures,
+    }
+    (output_path / "summary.json").write_text(json.dumps(summary, indent=2), encoding="utf-8")
+
+    logger.info(
+        "Speedup %.2fx (%.1f -> %.1f frames/s), peak memory %.0f -> %.0f MB.",
+        summary["speedup"] or 0.0, reference_perf["frames_per_second"], candidate_perf["frames_per_second"],
+        reference_perf["peak_memory_mb"] or 0.0, candidate_perf["peak_memory_mb"] or 0.0
+    )
+    for failure in failures:
+        logger.warning(failure)
+    if failures:
+        logger.error("The candidate failed %d acceptance criteria, see %s.", len(failures), output_path)
+    else:
+        logger.info("The candidate passed, see %s.", output_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Model visualizer running off the inverse kinematics loop."""
+
+import threading
+import time
+
+import numpy as np
+import opensim as osim
+
+
+class Visualizer:
+    """
+    Draw the model from a background thread, at most rate times per second, with the latest coordinates published by
+    the inverse kinematics. The visualizer draws its own copy of the state, so the inverse kinematics never waits for
+    the drawing and snapshots published in between two draws are skipped.
+    """
+
+    def __init__(self, model: osim.Model, state: osim.State, rate: float) -> None:
+        """
+        :param model: model with the visualizer enabled.
+        :type model: osim.Model
+        :param state: state of the model, copied for the drawing.
+        :type state: osim.State
+        :param rate: maximum number of draws per second. A value of zero draws every snapshot.
+        :type rate: float
+        """
+        self.model = model
+        self.state = osim.State(state)
+        self.period = 1 / rate if rate > 0 else 0.0
+        self._latest = None
+        self._lock = threading.Lock()
+        self._updated = threading.Event()
+        self._stop = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="visualizer", daemon=True)
+        self.thread.start()
+
+    def publish(self, time: float, q: np.ndarray) -> None:
+        """
+        Replace the snapshot to draw next.
+        :param time: time of the snapshot.
+        :type time: float
+        :param q: generalized coordinates of the model, e.g. from InverseKinematics.snapshot().
+        :type q: np.ndarray
+        """
+        with self._lock:
+            self._latest = time, q
+        self._updated.set()
+
+    def close(self) -> None:
+        """Stop drawing."""
+        self._stop.set()
+        self._updated.set()
+        self.thread.join()
+
+    def _run(self) -> None:
+        while True:
+            self._updated.wait()
+            if self._stop.is_set():
+                return
+            start = time.monotonic()
+            with self._lock:
+                snapshot_time, q = self._latest
+                self._updated.clear()
+            values = osim.Vector(len(q), 0.0)
+            for i, value in enumerate(q):
+                values.set(i, float(value))
+            self.state.setTime(snapshot_time)
+            self.state.setQ(values)
+            self.model.realizePosition(self.state)
+            self.model.getVisualizer().show(self.state)
+            if self.period:
+                self._stop.wait(max(0.0, self.period - (time.monotonic() - start)))